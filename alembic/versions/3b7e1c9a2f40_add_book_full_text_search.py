@@ -0,0 +1,74 @@
+"""Add book full-text search document and index
+
+Revision ID: 3b7e1c9a2f40
+Revises: 816f60f33935
+Create Date: 2026-10-18 10:05:12.418230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '3b7e1c9a2f40'
+down_revision: Union[str, Sequence[str], None] = '816f60f33935'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5("
+    "search_document, content='books', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books BEGIN "
+    "INSERT INTO books_fts(rowid, search_document) VALUES (new.id, new.search_document); END",
+    "CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books BEGIN "
+    "INSERT INTO books_fts(books_fts, rowid, search_document) VALUES ('delete', old.id, old.search_document); END",
+    "CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE OF search_document ON books BEGIN "
+    "INSERT INTO books_fts(books_fts, rowid, search_document) VALUES ('delete', old.id, old.search_document); "
+    "INSERT INTO books_fts(rowid, search_document) VALUES (new.id, new.search_document); END",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('books', sa.Column('search_document', sa.Text(), nullable=True))
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.execute(
+            """
+            UPDATE books SET search_document = concat_ws(' ', books.title, books.genre, books.description,
+                (SELECT string_agg(authors.name, ' ')
+                 FROM book_author JOIN authors ON authors.id = book_author.author_id
+                 WHERE book_author.book_id = books.id))
+            """
+        )
+        op.execute(
+            "CREATE INDEX ix_books_search_document_fts ON books "
+            "USING gin (to_tsvector('simple', coalesce(search_document, '')))"
+        )
+    elif dialect == 'sqlite':
+        op.execute(
+            """
+            UPDATE books SET search_document = books.title || ' ' || books.genre || ' ' || books.description
+                || coalesce(' ' || (SELECT group_concat(authors.name, ' ')
+                                    FROM book_author JOIN authors ON authors.id = book_author.author_id
+                                    WHERE book_author.book_id = books.id), '')
+            """
+        )
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+        op.execute("INSERT INTO books_fts(books_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_books_search_document_fts")
+    elif dialect == 'sqlite':
+        for trigger in ('books_fts_ai', 'books_fts_ad', 'books_fts_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS books_fts")
+    op.drop_column('books', 'search_document')
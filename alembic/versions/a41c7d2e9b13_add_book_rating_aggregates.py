@@ -0,0 +1,53 @@
+"""Add per-book review rating aggregates
+
+Revision ID: a41c7d2e9b13
+Revises: 3b7e1c9a2f40
+Create Date: 2026-10-18 11:42:37.905114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'a41c7d2e9b13'
+down_revision: Union[str, Sequence[str], None] = '3b7e1c9a2f40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNT_COLUMNS = ['rating_count', 'rating_sum'] + [f'rating_count_{star}' for star in range(1, 6)]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column in COUNT_COLUMNS:
+        op.add_column('books', sa.Column(column, sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('books', sa.Column('rating_average', sa.Float(), nullable=True))
+
+    # Backfill from existing reviews; from here on the API keeps them current.
+    histogram = ', '.join(
+        f"rating_count_{star} = (SELECT count(*) FROM reviews WHERE reviews.book_id = books.id AND reviews.rating = {star})"
+        for star in range(1, 6)
+    )
+    op.execute(
+        f"""
+        UPDATE books SET
+            rating_count = (SELECT count(*) FROM reviews WHERE reviews.book_id = books.id),
+            rating_sum = (SELECT coalesce(sum(rating), 0) FROM reviews WHERE reviews.book_id = books.id),
+            rating_average = (SELECT avg(rating * 1.0) FROM reviews WHERE reviews.book_id = books.id),
+            {histogram}
+        """
+    )
+
+    op.create_index('ix_books_rating_count', 'books', ['rating_count'])
+    op.create_index('ix_books_rating_average', 'books', ['rating_average'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_rating_average', table_name='books')
+    op.drop_index('ix_books_rating_count', table_name='books')
+    op.drop_column('books', 'rating_average')
+    for column in reversed(COUNT_COLUMNS):
+        op.drop_column('books', column)
@@ -0,0 +1,37 @@
+"""Add version and updated_at to books for ETags and optimistic locking
+
+Revision ID: c5e8a1f04d27
+Revises: a41c7d2e9b13
+Create Date: 2026-10-18 13:20:11.402187
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'c5e8a1f04d27'
+down_revision: Union[str, Sequence[str], None] = 'a41c7d2e9b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('books', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+    if op.get_bind().dialect.name == 'sqlite':
+        # SQLite cannot ADD COLUMN with a non-constant default, and rebuilding
+        # the table in batch mode would drop the books_fts triggers. Add it with
+        # a constant default and backfill; the ORM always sets updated_at.
+        op.add_column('books', sa.Column('updated_at', sa.DateTime(), nullable=False,
+                                         server_default='1970-01-01 00:00:00'))
+        op.execute("UPDATE books SET updated_at = CURRENT_TIMESTAMP")
+    else:
+        op.add_column('books', sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('books', 'updated_at')
+    op.drop_column('books', 'version')
@@ -0,0 +1,53 @@
+"""Add indexes for review lists, author name lookups and genre filters
+
+Revision ID: d9b3f6e2a851
+Revises: c5e8a1f04d27
+Create Date: 2026-10-18 13:41:52.118903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'd9b3f6e2a851'
+down_revision: Union[str, Sequence[str], None] = 'c5e8a1f04d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+KEEP = "SELECT min(id) AS keep_id, lower(name) AS lname FROM authors GROUP BY lower(name)"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_reviews_book_id_id', 'reviews', ['book_id', 'id'])
+    op.create_index('ix_reviews_user_id', 'reviews', ['user_id'])
+    op.create_index('ix_books_genre_lower', 'books', [sa.text('lower(genre)')])
+
+    # Merge authors whose names differ only by case into the oldest row before
+    # the unique index goes on: move their book links over, then drop them.
+    op.execute(
+        f"""
+        INSERT INTO book_author (book_id, author_id)
+        SELECT DISTINCT ba.book_id, k.keep_id
+        FROM book_author ba
+        JOIN authors a ON a.id = ba.author_id
+        JOIN ({KEEP}) k ON k.lname = lower(a.name)
+        WHERE a.id <> k.keep_id
+          AND NOT EXISTS (
+              SELECT 1 FROM book_author x WHERE x.book_id = ba.book_id AND x.author_id = k.keep_id
+          )
+        """
+    )
+    op.execute(f"DELETE FROM book_author WHERE author_id NOT IN (SELECT keep_id FROM ({KEEP}) k)")
+    op.execute(f"DELETE FROM authors WHERE id NOT IN (SELECT keep_id FROM ({KEEP}) k)")
+    op.create_index('ux_authors_name_lower', 'authors', [sa.text('lower(name)')], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ux_authors_name_lower', table_name='authors')
+    op.drop_index('ix_books_genre_lower', table_name='books')
+    op.drop_index('ix_reviews_user_id', table_name='reviews')
+    op.drop_index('ix_reviews_book_id_id', table_name='reviews')
@@ -0,0 +1,26 @@
+"""Index book_author by author for the author directory
+
+Revision ID: e4a7c2d8f615
+Revises: d9b3f6e2a851
+Create Date: 2026-10-18 14:05:33.270416
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = 'e4a7c2d8f615'
+down_revision: Union[str, Sequence[str], None] = 'd9b3f6e2a851'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_book_author_author_id', 'book_author', ['author_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_book_author_author_id', table_name='book_author')
@@ -0,0 +1,82 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
+from app.crud import crud
+from app.crud.projection import BookProjection
+from app.schemas.schemas import AuthorDetail, AuthorPage, Book, BookPage, TokenData
+from app.db.db import get_read_db
+from app.utils.json_utils import dumps
+from app.utils.pagination import decode_cursor, split_page
+
+from app.dependencies.dependencies import get_current_user
+
+router = APIRouter(
+    prefix="/authors",
+    tags=["Authors"],
+)
+
+CURSOR_DESCRIPTION = "Cursor pagination: pass an empty value for the first page, then the returned next_cursor"
+
+
+def parse_cursor(cursor: Optional[str]) -> Optional[int]:
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/", response_model=Union[List[AuthorDetail], AuthorPage])
+async def list_authors(
+    skip: int = 0,
+    limit: int = Query(20, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: TokenData = Depends(get_current_user),
+):
+    if cursor is None:
+        return Response(dumps(await crud.list_authors(db, skip, limit)), media_type="application/json")
+    rows = await crud.list_authors(db, limit=limit + 1, after_id=parse_cursor(cursor))
+    items, next_cursor = split_page(rows, limit)
+    return Response(dumps({"items": items, "next_cursor": next_cursor}), media_type="application/json")
+
+
+@router.get("/{author_id}", response_model=AuthorDetail)
+async def get_author(
+    author_id: int,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: TokenData = Depends(get_current_user),
+):
+    author = await crud.get_author_detail(db, author_id)
+    if not author:
+        raise HTTPException(status_code=404, detail="Author not found")
+    return Response(dumps(author), media_type="application/json")
+
+
+@router.get("/{author_id}/books", response_model=Union[List[Book], BookPage])
+async def list_author_books(
+    author_id: int,
+    skip: int = 0,
+    limit: int = Query(10, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    fields: Optional[str] = Query(None, description="Sparse fieldset, as for GET /books/"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: TokenData = Depends(get_current_user),
+):
+    try:
+        projection = BookProjection.from_param(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if cursor is None:
+        rows = await crud.get_books(db, skip, limit, author_id=author_id, projection=projection)
+        body = rows
+    else:
+        rows = await crud.get_books(db, limit=limit + 1, after_id=parse_cursor(cursor), author_id=author_id,
+                                    projection=projection)
+        items, next_cursor = split_page(rows, limit)
+        body = {"items": items, "next_cursor": next_cursor}
+    # An empty page is only a 404 when the author itself is missing.
+    if not rows and not await crud.get_author_by_id(db, author_id):
+        raise HTTPException(status_code=404, detail="Author not found")
+    return Response(dumps(body), media_type="application/json")
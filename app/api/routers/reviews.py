@@ -1,9 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.models.models import Review
-from app.schemas.schemas import ReviewCreate, ReviewOut, TokenData
-from app.db.db import get_db
+import io
+import json
+import zlib
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
+from app.models.models import Book, Review
+from app.crud import crud, bulk
+from app.config import settings
+from app.schemas.schemas import ReviewBulkReport, ReviewCreate, ReviewOut, ReviewPage, TokenData
+from app.db.db import get_db, get_read_db, on_replica
+from app.utils.pagination import decode_cursor, split_page
+from app.cache.cache import response_cache, dump_json
+from app.utils.conditional_utils import conditional_response, http_date, pack
 
 from app.dependencies.dependencies import get_current_user
 
@@ -13,18 +22,18 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=ReviewOut, status_code=status.HTTP_201_CREATED)
-def create_review(
+async def create_review(
     review: ReviewCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: TokenData = Depends(get_current_user),
 ):
-    print("Incoming review POST request")
-    print(f"Review data: {review}")
-    print(f"Current user: {current_user}")
-
     if not current_user.id:
         raise HTTPException(status_code=401, detail="User ID missing from token.")
 
+    if not await crud.add_book_ratings(db, review.book_id, [review.rating]):
+        await db.rollback()
+        raise HTTPException(status_code=404, detail="Book not found")
+
     db_review = Review(
         book_id=review.book_id,
         user_id=current_user.id,  # Correctly set user_id to integer ID from token
@@ -32,13 +41,99 @@ def create_review(
         text=review.text,
     )
     db.add(db_review)
-    db.commit()
-    db.refresh(db_review)
-    print(f"Review created with id: {db_review.id}")
+    await db.commit()
+    await db.refresh(db_review)
+    await response_cache.invalidate_reviews(db_review.book_id)
+    # Book responses embed the rating aggregates.
+    await response_cache.invalidate_book(db_review.book_id)
     return db_review
 
-@router.get("/book/{book_id}", response_model=List[ReviewOut])
-def get_book_reviews(book_id: int, db: Session = Depends(get_db)):
-    reviews = db.query(Review).filter(Review.book_id == book_id).all()
-    print(f"Fetched {len(reviews)} reviews for book_id {book_id}")
-    return reviews
+async def read_body(request: Request, limit: int) -> bytes:
+    # Refuses an oversized body from its Content-Length before reading any of
+    # it, and stops a chunked one as soon as it passes the limit.
+    too_large = HTTPException(status_code=413, detail=f"Request body is larger than {limit} bytes")
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > limit:
+        raise too_large
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise too_large
+    return bytes(body)
+
+
+@router.post("/bulk", response_model=ReviewBulkReport)
+async def create_reviews_bulk(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenData = Depends(get_current_user),
+):
+    # Body is a JSON array of ReviewCreate, or NDJSON with Content-Type
+    # application/x-ndjson. Each item gets its own result; rows are 1-based.
+    if not current_user.id:
+        raise HTTPException(status_code=401, detail="User ID missing from token.")
+    body = await read_body(request, settings.review_bulk_max_bytes)
+    if "ndjson" in request.headers.get("content-type", ""):
+        # Lines are decoded one by one, so bad UTF-8 is reported for its row.
+        rows = list(bulk.iter_ndjson(io.BytesIO(body)))
+    else:
+        try:
+            items = json.loads(body.decode("utf-8"))
+        except UnicodeDecodeError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid UTF-8: {e}")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of reviews")
+        rows = [(row, item, None if isinstance(item, dict) else "Expected an object")
+                for row, item in enumerate(items, start=1)]
+    if len(rows) > settings.review_bulk_max_items:
+        raise HTTPException(status_code=413, detail=f"At most {settings.review_bulk_max_items} reviews per request")
+    return await bulk.import_reviews(db, current_user.id, rows)
+
+
+DEFAULT_REVIEW_PAGE_SIZE = 50
+
+
+@router.get("/book/{book_id}", response_model=Union[List[ReviewOut], ReviewPage])
+async def get_book_reviews(
+    request: Request,
+    book_id: int,
+    skip: int = 0,
+    limit: Optional[int] = Query(None, description="Defaults to all reviews, or 50 per page in cursor mode"),
+    cursor: Optional[str] = Query(
+        None,
+        description="Cursor pagination: pass an empty value for the first page, then the returned next_cursor",
+    ),
+    db: AsyncSession = Depends(get_read_db),
+):
+    params = f"skip={skip}&limit={limit}&cursor={cursor}"
+
+    async def build_payload() -> str:
+        query = select(Review).where(Review.book_id == book_id).order_by(Review.id)
+        if cursor is None:
+            reviews = (await db.scalars(query.offset(skip).limit(limit))).all()
+            return dump_json(List[ReviewOut], reviews)
+
+        try:
+            after_id = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        page_size = limit or DEFAULT_REVIEW_PAGE_SIZE
+        if after_id is not None:
+            query = query.where(Review.id > after_id)
+        items, next_cursor = split_page((await db.scalars(query.limit(page_size + 1))).all(), page_size)
+        return dump_json(ReviewPage, {"items": items, "next_cursor": next_cursor})
+
+    async def build() -> str:
+        # Every review write bumps the book's version, so it validates the list too.
+        state = (await db.execute(select(Book.version, Book.updated_at).where(Book.id == book_id))).first()
+        version, updated_at = state if state else (0, None)
+        etag = f'"reviews-{book_id}-v{version}-{zlib.crc32(params.encode()):08x}"'
+        return pack(etag, http_date(updated_at), await build_payload())
+
+    cached = await response_cache.get_or_set(
+        await response_cache.review_list_key(book_id, params), build, store=not on_replica(db)
+    )
+    return conditional_response(request, cached)
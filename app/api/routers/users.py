@@ -1,23 +1,38 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, status, Depends, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta
 
 from app.db.db import get_db           
 from app.models.models import User
 from app.schemas.schemas import UserCreate, User as UserSchema, Token
-from app.utils import get_password_hash, verify_password
-from app.utils.jwt_utils import create_access_token
+from app.utils.password_utils import password_hasher, PasswordHasherBusy
+from app.utils.jwt_utils import create_access_token, InvalidToken
+from app.revocations.revocations import revocation_feed
+from app.dependencies.dependencies import oauth2_scheme
 from app.config import settings
 
 router = APIRouter()
 
+
+def hasher_busy_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication service is busy, retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/register", response_model=UserSchema, status_code=status.HTTP_201_CREATED)
-def register_user(user_create: UserCreate, db: Session = Depends(get_db)):
-    existing_user = db.query(User).filter(User.email == user_create.email).first()
+async def register_user(user_create: UserCreate, db: AsyncSession = Depends(get_db)):
+    existing_user = await db.scalar(select(User).where(User.email == user_create.email))
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    hashed_password = get_password_hash(user_create.password)
+    try:
+        hashed_password = await password_hasher.hash(user_create.password)
+    except PasswordHasherBusy:
+        raise hasher_busy_exception()
     # Assign role from user_create, default to 'Member' if not provided
     user_role = user_create.role if hasattr(user_create, 'role') and user_create.role else "Member"
     new_user = User(
@@ -28,18 +43,30 @@ def register_user(user_create: UserCreate, db: Session = Depends(get_db)):
         is_active=True
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
 @router.post("/login", response_model=Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == form_data.username).first()
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+    user = await db.scalar(select(User).where(User.email == form_data.username))
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
-    if not verify_password(form_data.password, user.hashed_password):
+    try:
+        verified = await password_hasher.verify(form_data.password, user.hashed_password)
+    except PasswordHasherBusy:
+        raise hasher_busy_exception()
+    if not verified:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
 
+    # Upgrade hashes made with an older cost factor while we have the plain password.
+    if password_hasher.needs_rehash(user.hashed_password):
+        try:
+            user.hashed_password = await password_hasher.hash(form_data.password)
+            await db.commit()
+        except PasswordHasherBusy:
+            pass  # not worth failing the login; the next one will retry
+
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     # Include user ID and role in JWT token payload
     access_token = create_access_token(
@@ -47,3 +74,14 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
         expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(token: str = Depends(oauth2_scheme)):
+    # Other workers pick the revocation up from the database (app.revocations).
+    try:
+        await revocation_feed.revoke(token)
+    except InvalidToken:
+        raise HTTPException(status_code=401, detail="Could not validate credentials",
+                            headers={"WWW-Authenticate": "Bearer"})
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
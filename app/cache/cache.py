@@ -0,0 +1,169 @@
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from pydantic import parse_obj_as
+
+from app.config import settings
+from app.utils.json_utils import dumps
+
+
+class MemoryCacheBackend:
+    # Per-process LRU with a TTL per entry. With several workers each one keeps
+    # its own copy, so use the redis backend when invalidation must be shared.
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            _, value = self._entries.pop(key, (None, "0"))
+            value = str(int(value) + 1)
+            # Generation counters never expire and are never evicted first.
+            self._entries[key] = (None, value)
+            return int(value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCacheBackend:
+    # Built on redis.asyncio, so a lookup awaits its round trip instead of
+    # holding the event loop. Works with any client exposing the same
+    # get/set/delete/incr/scan_iter coroutines.
+    def __init__(self, client, prefix: str = "book_library:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self.client.get(self.prefix + key)
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        return value
+
+    async def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        await self.client.set(self.prefix + key, value, ex=ttl or None)
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(self.prefix + key)
+
+    async def incr(self, key: str) -> int:
+        return int(await self.client.incr(self.prefix + key))
+
+    async def clear(self) -> None:
+        async for key in self.client.scan_iter(match=self.prefix + "*"):
+            await self.client.delete(key)
+
+
+class ResponseCache:
+    # Read-through cache of serialized JSON payloads. List pages embed a
+    # generation number in their key, so one write invalidates every page of
+    # that list without tracking individual keys.
+    def __init__(self, backend, ttl: int = 60, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    async def _call(self, method: str, *args):
+        # The memory backend answers inline; the redis one returns a coroutine.
+        result = getattr(self.backend, method)(*args)
+        return await result if inspect.isawaitable(result) else result
+
+    async def get_or_set(self, key: str, build: Callable[[], Awaitable[str]], store: bool = True) -> str:
+        # store=False still serves hits but does not keep what build() returns:
+        # for payloads read from a replica, which may predate the last write.
+        if not self.enabled:
+            return await build()
+        payload = await self._call("get", key)
+        if payload is not None:
+            self.hits += 1
+            return payload
+        self.misses += 1
+        payload = await build()
+        if store:
+            await self._call("set", key, payload, self.ttl)
+        return payload
+
+    async def generation(self, namespace: str) -> str:
+        return await self._call("get", f"gen:{namespace}") or "0"
+
+    async def bump(self, namespace: str) -> None:
+        await self._call("incr", f"gen:{namespace}")
+
+    def book_key(self, book_id: int) -> str:
+        return f"book:{book_id}"
+
+    async def book_list_key(self, params: str) -> str:
+        return f"books:{await self.generation('books')}:{params}"
+
+    async def review_list_key(self, book_id: int, params: str) -> str:
+        return f"reviews:{book_id}:{await self.generation(f'reviews:{book_id}')}:{params}"
+
+    async def invalidate_book(self, book_id: Optional[int] = None) -> None:
+        if book_id is not None:
+            await self._call("delete", self.book_key(book_id))
+        await self.bump("books")
+
+    async def invalidate_reviews(self, book_id: int) -> None:
+        await self.bump(f"reviews:{book_id}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def dump_json(model_type: Any, obj: Any) -> str:
+    # Validate through the response schema once, so cached payloads can be sent as-is.
+    return dumps(parse_obj_as(model_type, obj))
+
+
+def create_backend():
+    if settings.cache_backend == "redis":
+        import redis.asyncio  # optional dependency, only needed for the shared backend
+
+        return RedisCacheBackend(redis.asyncio.Redis.from_url(settings.cache_url))
+    return MemoryCacheBackend(max_entries=settings.cache_max_entries)
+
+
+response_cache = ResponseCache(
+    create_backend(), ttl=settings.cache_ttl_seconds, enabled=settings.cache_enabled
+)
@@ -0,0 +1,181 @@
+import gzip
+import hashlib
+import time
+from typing import Callable, Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.cache.cache import MemoryCacheBackend
+from app.config import settings
+
+try:
+    import brotli
+except ImportError:  # optional, "br" is simply not offered without it
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional, "zstd" is simply not offered without it
+    zstandard = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/", "application/javascript", "image/svg+xml")
+
+
+def available_codecs(gzip_level: int = 6, brotli_quality: int = 4, zstd_level: int = 3) -> Dict[str, Callable[[bytes], bytes]]:
+    # mtime=0 keeps gzip output a pure function of the body, so it can be cached.
+    codecs = {"gzip": lambda body: gzip.compress(body, compresslevel=gzip_level, mtime=0)}
+    if brotli is not None:
+        codecs["br"] = lambda body: brotli.compress(body, quality=brotli_quality)
+    if zstandard is not None:
+        # Compressor objects are not thread-safe, so each call gets its own.
+        codecs["zstd"] = lambda body: zstandard.ZstdCompressor(level=zstd_level).compress(body)
+    return codecs
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    preferences = {}
+    for part in header.split(","):
+        coding, *params = part.split(";")
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding.strip():
+            preferences[coding.strip().lower()] = quality
+    return preferences
+
+
+def choose_encoding(header: Optional[str], encodings: List[str]) -> Optional[str]:
+    # Highest client q-value wins; ties go to the server's order. None means identity.
+    if not header:
+        return None
+    preferences = parse_accept_encoding(header)
+    wildcard = preferences.get("*", 0.0)
+    ranked = [(preferences.get(encoding, wildcard), -index, encoding) for index, encoding in enumerate(encodings)]
+    quality, _, encoding = max(ranked, default=(0.0, 0, None))
+    return encoding if quality > 0 else None
+
+
+class Compressor:
+    # Compressed bodies are cached by encoding and a digest of the body, so a
+    # cached page served again is hashed (~1 GB/s) rather than recompressed.
+    # Bodies of threadpool_bytes or more are compressed on the threadpool;
+    # zlib, brotli and zstd release the GIL while they work.
+    def __init__(self, codecs: Dict[str, Callable[[bytes], bytes]], encodings: List[str], min_size: int = 1024,
+                 threadpool_bytes: int = 65536, cache_entries: int = 256):
+        self.codecs = codecs
+        self.encodings = [encoding for encoding in encodings if encoding in codecs]
+        self.min_size = min_size
+        self.threadpool_bytes = threadpool_bytes
+        self.cache = MemoryCacheBackend(max_entries=cache_entries) if cache_entries > 0 else None
+        self.responses = 0
+        self.cache_hits = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+
+    def _compress(self, encoding: str, body: bytes) -> bytes:
+        started = time.perf_counter()
+        compressed = self.codecs[encoding](body)
+        self.seconds += time.perf_counter() - started
+        return compressed
+
+    async def compress(self, encoding: str, body: bytes) -> bytes:
+        key = None
+        compressed = None
+        if self.cache is not None:
+            key = f"{encoding}:{hashlib.blake2b(body, digest_size=16).hexdigest()}"
+            compressed = self.cache.get(key)
+            if compressed is not None:
+                self.cache_hits += 1
+        if compressed is None:
+            if len(body) >= self.threadpool_bytes:
+                compressed = await run_in_threadpool(self._compress, encoding, body)
+            else:
+                compressed = self._compress(encoding, body)
+            if key is not None:
+                self.cache.set(key, compressed)
+        self.responses += 1
+        self.bytes_in += len(body)
+        self.bytes_out += len(compressed)
+        return compressed
+
+    def stats(self) -> dict:
+        return {
+            "encodings": self.encodings,
+            "responses": self.responses,
+            "cache_hits": self.cache_hits,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else 0.0,
+            "seconds": round(self.seconds, 6),
+        }
+
+
+def compressible(headers: Headers) -> bool:
+    content_type = headers.get("content-type", "")
+    return content_type.startswith(COMPRESSIBLE_TYPES) and "content-encoding" not in headers
+
+
+class CompressionMiddleware:
+    # Plain ASGI, like RateLimitMiddleware. Only complete bodies are compressed:
+    # a response sent in several chunks (the export stream, files) passes
+    # through untouched. A client that negotiated an encoding gets weak ETags
+    # on every response that varies by it, 304s and bodies too small to
+    # compress included, so its 200s and 304s carry the same validator. Other
+    # clients keep the strong tag, which is what If-Match needs.
+    def __init__(self, app, compressor: Compressor):
+        self.app = app
+        self.compressor = compressor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.compressor.encodings:
+            return await self.app(scope, receive, send)
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"), self.compressor.encodings)
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                return await send(message)
+
+            held, start = start, None
+            headers = MutableHeaders(scope=held)
+            can_compress = compressible(headers)
+            if can_compress:
+                headers.add_vary_header("Accept-Encoding")
+            if encoding is not None and "accept-encoding" in headers.get("vary", "").lower():
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+            body = message.get("body", b"")
+            if (not can_compress or encoding is None or message.get("more_body", False)
+                    or len(body) < self.compressor.min_size):
+                await send(held)
+                return await send(message)
+
+            body = await self.compressor.compress(encoding, body)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            await send(held)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+compressor = Compressor(
+    available_codecs(settings.compression_gzip_level, settings.compression_brotli_quality,
+                     settings.compression_zstd_level),
+    [encoding.strip() for encoding in settings.compression_encodings.split(",") if encoding.strip()],
+    min_size=settings.compression_min_bytes,
+    threadpool_bytes=settings.compression_threadpool_bytes,
+    cache_entries=settings.compression_cache_entries,
+)
@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -5,6 +6,83 @@ class Settings(BaseSettings):
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    jwt_backend: str = "jose"  # "pyjwt" uses PyJWT when it is installed
+    jwt_cache_size: int = 10000  # 0 disables the decoded-token cache
+    jwt_revocation_poll_interval: float = 1.0  # how soon other workers see a logout
+
+    password_hash_rounds: int = 12
+    password_hash_workers: int = 2  # 0 hashes on the threadpool instead of a process pool
+    password_hash_max_pending: int = 64
+
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 10.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_timeout_ms: Optional[int] = None
+    database_replica_urls: str = ""  # comma-separated read replicas
+    replica_check_interval: float = 5.0
+    replica_sticky_seconds: float = 5.0  # reads go to the primary this long after the caller writes
+
+    web_bind: str = "0.0.0.0:8000"
+    web_workers: Optional[int] = None  # defaults to the CPU count
+    web_preload: bool = True
+    web_timeout: int = 60
+    web_graceful_timeout: int = 30
+    web_keepalive: int = 5
+    web_max_requests: int = 0  # recycle workers after this many requests; 0 = never
+    warmup_connections: int = 4
+
+    import_chunk_size: int = 1000
+    author_cache_size: int = 10000  # author name -> row cache used when writing books
+    review_bulk_max_items: int = 5000
+    review_bulk_max_bytes: int = 10 * 1024 * 1024
+
+    job_workers: int = 2  # per process; 0 leaves jobs in the table for another process
+    job_queue_size: int = 1000
+    job_max_attempts: int = 5
+    job_retry_delay: float = 1.0  # doubled after every failed attempt
+    job_poll_interval: float = 5.0
+    job_lease_seconds: float = 300.0  # a running job older than this is assumed lost and retried
+    job_shutdown_timeout: float = 10.0
+
+    log_level: str = "INFO"
+    log_file: Optional[str] = "../../logs/api.log"
+    log_to_stdout: bool = False
+    log_sample_rate: float = 0.1
+    log_sampled_paths: str = "/ping,/books/,/reviews/book/,/covers/"
+    log_slow_request_ms: float = 500.0
+
+    cover_dir: str = "../static"
+    cover_max_bytes: int = 10 * 1024 * 1024
+    cover_thumbnail_widths: str = "128,256,512"
+    cover_cache_max_age: int = 31536000
+    cover_cleanup_grace_seconds: int = 300  # a cover re-uploaded this recently is not deleted
+
+    cache_enabled: bool = True
+    cache_backend: str = "memory"  # "memory" or "redis"
+    cache_url: Optional[str] = None
+    cache_ttl_seconds: int = 60
+    cache_max_entries: int = 1024
+
+    compression_enabled: bool = True
+    compression_encodings: str = "zstd,br,gzip"  # server preference; br and zstd need brotli / zstandard
+    compression_min_bytes: int = 1024  # smaller bodies are sent as they are
+    compression_threadpool_bytes: int = 65536  # bodies this large are compressed off the event loop
+    compression_cache_entries: int = 256  # compressed bodies kept for repeat hits; 0 disables
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    compression_zstd_level: int = 3
+
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "memory"  # "memory" (per process) or "redis" (shared)
+    rate_limit_url: Optional[str] = None  # defaults to cache_url
+    rate_limit_max_keys: int = 100_000
+    # "METHOD /path=requests/seconds" separated by ";", first match wins; "/path*" matches a prefix.
+    rate_limit_policies: str = (
+        "POST /users/login=10/60;POST /users/register=5/60;POST /books/=60/60;"
+        "POST /books/import=5/60;POST /reviews/bulk=30/60"
+    )
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,257 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.cache.cache import response_cache
+from app.crud.search import search_document_for
+from app.crud.crud import author_cache
+from app.jobs.jobs import job_queue
+from app.models.models import Author, Book, Review, book_author_table
+from app.schemas.schemas import BookCreate, ReviewCreate
+
+MAX_REPORTED_ERRORS = 1000
+
+# (row number, parsed record or None, parse error or None)
+ImportRow = Tuple[int, Optional[dict], Optional[str]]
+
+
+def iter_ndjson(lines: Iterable) -> Iterator[ImportRow]:
+    # Lines may be bytes (uploads), so a bad UTF-8 sequence only costs its own row.
+    for row_number, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            try:
+                line = line.decode("utf-8")
+            except UnicodeDecodeError as e:
+                yield row_number, None, f"Invalid UTF-8: {e}"
+                continue
+        if not line.strip():
+            continue
+        try:
+            yield row_number, json.loads(line), None
+        except ValueError as e:
+            yield row_number, None, f"Invalid JSON: {e}"
+
+
+def iter_csv(text: IO[str]) -> Iterator[ImportRow]:
+    # Columns match BookCreate; `authors` holds names separated by ";". The
+    # reader cannot resume after a decode or CSV error, so that ends the file
+    # with an error entry; rows read before it are still imported.
+    reader = csv.DictReader(text)
+    try:
+        for record in reader:
+            authors = record.pop("authors", None) or ""
+            record["authors"] = [{"name": name.strip()} for name in authors.split(";") if name.strip()]
+            yield reader.line_num, {key: value for key, value in record.items() if value != ""}, None
+    except (UnicodeDecodeError, csv.Error) as e:
+        yield reader.line_num + 1, None, f"Could not read the rest of the file: {e}"
+
+
+def iter_import_rows(fileobj: IO[bytes], fmt: str) -> Iterator[ImportRow]:
+    if fmt == "csv":
+        return iter_csv(io.TextIOWrapper(fileobj, encoding="utf-8", newline=""))
+    return iter_ndjson(fileobj)
+
+
+class ImportReport:
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    def add_error(self, row: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": error})
+
+    def as_dict(self) -> dict:
+        return {"imported": self.imported, "failed": self.failed, "errors": self.errors}
+
+
+async def resolve_authors(db: AsyncSession, books: List[BookCreate]) -> Dict[str, int]:
+    # One SELECT for every name in the chunk, then one multi-row INSERT ... RETURNING
+    # for the names that are new, instead of a lookup and a commit per author.
+    # Names are unique case-insensitively, so everything is keyed by lower(name).
+    wanted = {}
+    for book in books:
+        for author in book.authors:
+            wanted.setdefault(author.name.lower(), author)
+    if not wanted:
+        return {}
+
+    ids = {}
+    for name in wanted:
+        cached = author_cache.get(name)
+        if cached is not None:
+            ids[name] = cached["id"]
+    unknown = [name for name in wanted if name not in ids]
+    if unknown:
+        existing = await db.execute(
+            select(func.lower(Author.name), Author.id).where(func.lower(Author.name).in_(unknown))
+        )
+        ids.update({name: author_id for name, author_id in existing})
+    missing = [
+        {
+            "name": author.name,
+            "biography": author.biography,
+            "birth_date": author.birth_date,
+            "nationality": author.nationality,
+        }
+        for name, author in wanted.items()
+        if name not in ids
+    ]
+    if missing:
+        created = await db.execute(insert(Author).returning(Author.name, Author.id), missing)
+        ids.update({name.lower(): author_id for name, author_id in created})
+    return ids
+
+
+async def insert_chunk(db: AsyncSession, books: List[BookCreate]) -> None:
+    author_ids = await resolve_authors(db, books)
+    book_rows = [
+        {
+            "title": book.title,
+            "genre": book.genre,
+            "page_count": book.page_count,
+            "publication_year": book.publication_year,
+            "description": book.description,
+            "cover_image": book.cover_image,
+            "search_document": search_document_for(
+                book.title, book.genre, book.description, [author.name for author in book.authors]
+            ),
+        }
+        for book in books
+    ]
+    result = await db.execute(insert(Book).returning(Book.id, sort_by_parameter_order=True), book_rows)
+    book_ids = result.scalars().all()
+
+    links = {
+        (book_id, author_ids[author.name.lower()])
+        for book_id, book in zip(book_ids, books)
+        for author in book.authors
+    }
+    if links:
+        await db.execute(
+            insert(book_author_table), [{"book_id": b, "author_id": a} for b, a in links]
+        )
+
+
+async def flush_chunk(db: AsyncSession, chunk: List[Tuple[int, BookCreate]], report: ImportReport) -> None:
+    if not chunk:
+        return
+    try:
+        await insert_chunk(db, [book for _, book in chunk])
+        await db.commit()
+        report.imported += len(chunk)
+        return
+    except SQLAlchemyError:
+        await db.rollback()
+
+    # Something in the chunk was rejected by the database; retry row by row so
+    # only the offending rows are reported and the rest still land.
+    for row_number, book in chunk:
+        try:
+            await insert_chunk(db, [book])
+            await db.commit()
+            report.imported += 1
+        except SQLAlchemyError as e:
+            await db.rollback()
+            report.add_error(row_number, str(e.orig if getattr(e, "orig", None) else e))
+
+
+def read_chunk(rows: Iterator[ImportRow], chunk_size: int, report: ImportReport) -> List[Tuple[int, BookCreate]]:
+    # Up to chunk_size valid rows; the invalid ones go straight to the report.
+    # An empty chunk means the rows are exhausted.
+    chunk: List[Tuple[int, BookCreate]] = []
+    for row_number, data, error in rows:
+        if error:
+            report.add_error(row_number, error)
+            continue
+        try:
+            chunk.append((row_number, BookCreate(**data)))
+        except (ValidationError, TypeError) as e:
+            report.add_error(row_number, str(e))
+            continue
+        if len(chunk) >= chunk_size:
+            break
+    return chunk
+
+
+async def import_books(db: AsyncSession, rows: Iterable[ImportRow], chunk_size: int = 1000) -> ImportReport:
+    # Reading, parsing and validating a chunk is blocking CPU work, so it runs
+    # on the threadpool; the event loop only waits for the inserts.
+    report = ImportReport()
+    rows = iter(rows)
+    while chunk := await run_in_threadpool(read_chunk, rows, chunk_size, report):
+        await flush_chunk(db, chunk, report)
+
+    if report.imported:
+        await response_cache.invalidate_book()
+    return report
+
+
+async def import_reviews(db: AsyncSession, user_id: int, rows: Iterable[ImportRow]) -> dict:
+    # All-or-nothing for the valid rows: one set query for the book ids and one
+    # executemany INSERT in one transaction. Rows that fail validation are
+    # reported and skipped.
+    results: List[dict] = []
+    valid: List[Tuple[dict, ReviewCreate]] = []
+    for row_number, data, error in rows:
+        result = {"row": row_number, "status": 201, "id": None, "error": error}
+        results.append(result)
+        if error:
+            result["status"] = 422
+            continue
+        try:
+            valid.append((result, ReviewCreate(**data)))
+        except (ValidationError, TypeError) as e:
+            result["status"], result["error"] = 422, str(e)
+
+    book_ids = {review.book_id for _, review in valid}
+    existing = set((await db.scalars(select(Book.id).where(Book.id.in_(book_ids)))).all()) if book_ids else set()
+    for result, review in valid:
+        if review.book_id not in existing:
+            result["status"], result["error"] = 404, "Book not found"
+    valid = [(result, review) for result, review in valid if review.book_id in existing]
+
+    if valid:
+        inserted = await db.execute(
+            insert(Review).returning(Review.id, sort_by_parameter_order=True),
+            [
+                {"book_id": review.book_id, "user_id": user_id, "rating": review.rating, "text": review.text}
+                for _, review in valid
+            ],
+        )
+        for (result, _), review_id in zip(valid, inserted.scalars().all()):
+            result["id"] = review_id
+
+        book_ids = sorted({review.book_id for _, review in valid})
+        # Review list ETags are built from the book version, so it is bumped
+        # here with one statement; otherwise a client could get a 304 for a
+        # list that has changed.
+        await db.execute(
+            update(Book)
+            .where(Book.id.in_(book_ids))
+            .values(version=Book.version + 1, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        # The aggregates are recomputed by a job after the response, instead of
+        # one UPDATE per book here. Its row commits with the reviews, so a crash
+        # after the commit cannot lose it.
+        job = job_queue.add(db, "books.recompute_ratings", book_ids=book_ids)
+        await db.commit()
+        # Cached pages are dropped now so the caller sees its reviews.
+        for book_id in book_ids:
+            await response_cache.invalidate_reviews(book_id)
+            await response_cache.invalidate_book(book_id)
+        job_queue.offer(job)
+
+    created = len(valid)
+    return {"created": created, "failed": len(results) - created, "results": results}
@@ -1,42 +1,106 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.models.models import Book, Author
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import Float, cast, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached, selectinload
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.sql import Select
+from typing import Iterable, List, Optional, Union
+from app.models.models import Book, Author, Review, book_author_table
 from app.schemas.schemas import BookCreate, BookUpdate, AuthorCreate
+from app.crud.search import apply_search, build_search_document
+from app.crud.projection import BookProjection
+from app.cache.cache import MemoryCacheBackend, response_cache
+from app.config import settings
 
 
+def paginate(stmt: Select, id_column, skip: int, limit: int, after_id: Optional[int] = None) -> Select:
+    # Keyset mode seeks past the last id seen via the primary key index instead of
+    # scanning and discarding `skip` rows; offset mode is kept for old clients.
+    stmt = stmt.order_by(id_column)
+    if after_id is not None:
+        return stmt.where(id_column > after_id).limit(limit)
+    return stmt.offset(skip).limit(limit)
 
 
-def get_author_by_id(db: Session, author_id: int) -> Optional[Author]:
-    return db.query(Author).filter(Author.id == author_id).first()
+# lower(name) -> the author's column values. Authors are only ever inserted,
+# so entries stay valid; a hit becomes a session object via merge(load=False)
+# without a SELECT. Filled on every lookup and insert.
+author_cache = MemoryCacheBackend(max_entries=settings.author_cache_size)
+AUTHOR_COLUMNS = ("name", "biography", "birth_date", "nationality", "id")
 
-def get_author_by_name(db: Session, name: str) -> Optional[Author]:
-    return db.query(Author).filter(Author.name == name).first()
 
-def create_author(db: Session, author_create: AuthorCreate) -> Author:
+def remember_author(author: Author) -> Author:
+    author_cache.set(author.name.lower(), {column: getattr(author, column) for column in AUTHOR_COLUMNS})
+    return author
+
+
+async def get_author_by_id(db: AsyncSession, author_id: int) -> Optional[Author]:
+    return await db.scalar(select(Author).where(Author.id == author_id))
+
+async def get_author_by_name(db: AsyncSession, name: str) -> Optional[Author]:
+    # Matches the unique lower(name) index, so this is an index lookup.
+    author = await db.scalar(select(Author).where(func.lower(Author.name) == name.lower()))
+    return remember_author(author) if author else None
+
+async def create_author(db: AsyncSession, author_create: AuthorCreate) -> Author:
     db_author = Author(
         name=author_create.name,
         biography=author_create.biography,
         birth_date=author_create.birth_date,
         nationality=author_create.nationality,
     )
-    db.add(db_author)
-    db.commit()
-    db.refresh(db_author)
-    return db_author
+    try:
+        # A savepoint, so losing a race on the unique name only undoes this insert.
+        async with db.begin_nested():
+            db.add(db_author)
+    except IntegrityError:
+        existing = await get_author_by_name(db, author_create.name)
+        if existing is None:
+            raise
+        return existing
+    await db.commit()
+    return remember_author(db_author)
 
-def list_authors(db: Session, skip: int = 0, limit: int = 10) -> List[Author]:
-    return db.query(Author).offset(skip).limit(limit).all()
+async def resolve_author(db: AsyncSession, author_in: AuthorCreate) -> Author:
+    cached = author_cache.get(author_in.name.lower())
+    if cached is not None:
+        author = Author(**cached)
+        make_transient_to_detached(author)
+        return await db.merge(author, load=False)
+    return await get_author_by_name(db, author_in.name) or await create_author(db, author_in)
+
+
+def author_select() -> Select:
+    # Book counts come from the association table in the same query, so
+    # Author.books is never loaded.
+    book_count = func.count(book_author_table.c.book_id).label("book_count")
+    return (
+        select(Author, book_count)
+        .outerjoin(book_author_table, book_author_table.c.author_id == Author.id)
+        .group_by(Author.id)
+    )
 
 
+def with_book_count(row) -> dict:
+    author, book_count = row
+    return {**{column: getattr(author, column) for column in AUTHOR_COLUMNS}, "book_count": book_count}
 
 
-def create_book(db: Session, book_create: BookCreate) -> Book:
-    authors = []
-    for author_in in book_create.authors:
-        db_author = get_author_by_name(db, author_in.name)
-        if not db_author:
-            db_author = create_author(db, author_in)
-        authors.append(db_author)
+async def list_authors(
+    db: AsyncSession, skip: int = 0, limit: int = 10, after_id: Optional[int] = None
+) -> List[dict]:
+    rows = await db.execute(paginate(author_select(), Author.id, skip, limit, after_id))
+    return [with_book_count(row) for row in rows.all()]
+
+async def get_author_detail(db: AsyncSession, author_id: int) -> Optional[dict]:
+    row = (await db.execute(author_select().where(Author.id == author_id))).first()
+    return with_book_count(row) if row else None
+
+
+async def create_book(db: AsyncSession, book_create: BookCreate) -> Book:
+    authors = [await resolve_author(db, author_in) for author_in in book_create.authors]
 
     db_book = Book(
         title=book_create.title,
@@ -47,57 +111,178 @@ def create_book(db: Session, book_create: BookCreate) -> Book:
         cover_image=book_create.cover_image,
         authors=authors,
     )
+    db_book.search_document = build_search_document(db_book)
     db.add(db_book)
-    db.commit()
-    db.refresh(db_book)
+    await db.commit()
+    await response_cache.invalidate_book()
+    # The async session does not expire on commit, so authors stay loaded for the response.
     return db_book
 
 
-def get_books(db: Session, skip: int = 0, limit: int = 10) -> List[Book]:
-    return db.query(Book).offset(skip).limit(limit).all()
+def book_select() -> Select:
+    # Authors are always part of the Book response, so load them for the whole
+    # page in one extra SELECT ... WHERE book_id IN (...) instead of one per row.
+    return select(Book).options(selectinload(Book.authors))
+
+
+BOOK_SORTS = {
+    "rating": (Book.rating_average.desc().nulls_last(), Book.rating_count.desc()),
+    "popularity": (Book.rating_count.desc(),),
+}
+
 
+def filter_books(
+    stmt: Select, genre: Optional[str] = None, author: Optional[str] = None, author_id: Optional[int] = None
+) -> Select:
+    if author_id is not None:
+        # Semi-join on book_author(author_id), so no Author rows are read.
+        stmt = stmt.where(
+            Book.id.in_(select(book_author_table.c.book_id).where(book_author_table.c.author_id == author_id))
+        )
+    if genre:
+        # Exact, case-insensitive: served by the lower(genre) index, unlike ILIKE '%x%'.
+        stmt = stmt.where(func.lower(Book.genre) == genre.strip().lower())
+    if author:
+        stmt = stmt.where(Book.authors.any(Author.name.ilike(f"%{author}%")))
+    return stmt
 
-def get_book(db: Session, book_id: int) -> Optional[Book]:
-    return db.query(Book).filter(Book.id == book_id).first()
 
+async def get_books(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 10,
+    genre: Optional[str] = None,
+    author: Optional[str] = None,
+    after_id: Optional[int] = None,
+    sort: Optional[str] = None,
+    projection: Optional[BookProjection] = None,
+    author_id: Optional[int] = None,
+) -> Union[List[Book], List[dict]]:
+    # With a projection the rows come back as plain dicts ready for JSON.
+    base = projection.select() if projection else book_select()
+    stmt = filter_books(base, genre=genre, author=author, author_id=author_id)
+    if sort:
+        # Sorts read the materialized rating columns, never the reviews table.
+        stmt = stmt.order_by(*BOOK_SORTS[sort])
+    stmt = paginate(stmt, Book.id, skip, limit, after_id)
+    if projection:
+        return await projection.fetch(db, stmt)
+    return (await db.scalars(stmt)).all()
 
-def delete_book(db: Session, book_id: int) -> Optional[Book]:
-    book = db.query(Book).filter(Book.id == book_id).first()
+
+async def get_book(db: AsyncSession, book_id: int) -> Optional[Book]:
+    return await db.scalar(book_select().where(Book.id == book_id))
+
+
+async def delete_book(db: AsyncSession, book_id: int) -> Optional[Book]:
+    book = await db.scalar(select(Book).where(Book.id == book_id))
     if not book:
         return None
-    db.delete(book)
-    db.commit()
+    await db.delete(book)
+    await db.commit()
+    await response_cache.invalidate_book(book_id)
+    await response_cache.invalidate_reviews(book_id)
     return book
 
 
-def search_books(db: Session, query: str, skip: int = 0, limit: int = 10) -> List[Book]:
-    q = f"%{query.lower()}%"
-    # Note: update to handle authors once relationship is in place
-    return db.query(Book).filter(
-        (Book.title.ilike(q))  # Adjust author filter after relationships
-    ).offset(skip).limit(limit).all()
+async def search_books(
+    db: AsyncSession,
+    query: str,
+    skip: int = 0,
+    limit: int = 10,
+    after_id: Optional[int] = None,
+    ranked: bool = True,
+    projection: Optional[BookProjection] = None,
+) -> Union[List[Book], List[dict]]:
+    # Cursor pages must be ordered by id alone, so callers paging by cursor pass ranked=False.
+    dialect_name = db.get_bind().dialect.name
+    stmt = apply_search(projection.select() if projection else book_select(), dialect_name, query, ranked=ranked)
+    stmt = paginate(stmt, Book.id, skip, limit, after_id)
+    if projection:
+        return await projection.fetch(db, stmt)
+    return (await db.scalars(stmt)).all()
 
 
-def update_book(db: Session, book_id: int, book_update: BookUpdate) -> Optional[Book]:
-    book = db.query(Book).filter(Book.id == book_id).first()
+class BookVersionConflict(Exception):
+    pass
+
+
+async def update_book(
+    db: AsyncSession, book_id: int, book_update: BookUpdate, expected_version: Optional[int] = None
+) -> Optional[Book]:
+    # The UPDATE is guarded by the version that was read (version_id_col), so a
+    # concurrent writer makes this raise BookVersionConflict instead of being
+    # silently overwritten. expected_version comes from the client's If-Match.
+    book = await get_book(db, book_id)
     if not book:
         return None
+    if expected_version is not None and book.version != expected_version:
+        raise BookVersionConflict(book.version)
 
     update_data = book_update.dict(exclude_unset=True)
 
     if "authors" in update_data:
-        authors = []
-        for author_in in update_data["authors"]:
-            db_author = get_author_by_name(db, author_in.name)
-            if not db_author:
-                db_author = create_author(db, author_in)
-            authors.append(db_author)
-        book.authors = authors
+        book.authors = [await resolve_author(db, author_in) for author_in in book_update.authors]
         del update_data["authors"]
 
     for key, value in update_data.items():
         setattr(book, key, value)
+    book.search_document = build_search_document(book)
 
-    db.commit()
-    db.refresh(book)
+    try:
+        await db.commit()
+    except StaleDataError:
+        await db.rollback()
+        raise BookVersionConflict(None)
+    await response_cache.invalidate_book(book_id)
     return book
+
+
+async def add_book_ratings(db: AsyncSession, book_id: int, ratings: Iterable[int]) -> bool:
+    # A single UPDATE that increments the aggregates in place, so concurrent
+    # reviews of the same book cannot lose each other's counts. The caller
+    # commits; returns False when the book does not exist.
+    ratings = list(ratings)
+    count, total = len(ratings), sum(ratings)
+    values = {
+        # Core UPDATE skips the mapper's version counter, so bump it here.
+        "version": Book.version + 1,
+        "updated_at": datetime.utcnow(),
+        "rating_count": Book.rating_count + count,
+        "rating_sum": Book.rating_sum + total,
+        "rating_average": cast(Book.rating_sum + total, Float) / (Book.rating_count + count),
+    }
+    for star, star_count in Counter(ratings).items():
+        column = f"rating_count_{star}"
+        values[column] = getattr(Book, column) + star_count
+    result = await db.execute(
+        update(Book)
+        .where(Book.id == book_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
+
+
+async def recompute_book_ratings(db: AsyncSession, book_ids: Iterable[int]) -> None:
+    # Rebuilds the aggregates from the reviews table with one correlated
+    # UPDATE, so unlike add_book_ratings it is safe to run more than once.
+    def review_stat(expr, *criteria):
+        return select(expr).where(Review.book_id == Book.id, *criteria).scalar_subquery()
+
+    values = {
+        "version": Book.version + 1,
+        "updated_at": datetime.utcnow(),
+        "rating_count": review_stat(func.count()),
+        "rating_sum": review_stat(func.coalesce(func.sum(Review.rating), 0)),
+        "rating_average": review_stat(cast(func.avg(Review.rating), Float)),
+    }
+    for star in range(1, 6):
+        values[f"rating_count_{star}"] = review_stat(func.count(), Review.rating == star)
+    await db.execute(
+        update(Book)
+        .where(Book.id.in_(list(book_ids)))
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
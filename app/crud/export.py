@@ -0,0 +1,70 @@
+import csv
+import io
+import json
+import zlib
+from typing import AsyncIterator, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.crud.crud import book_select, filter_books
+from app.models.models import Book
+from app.schemas.schemas import Book as BookSchema, ReviewOut
+
+CSV_COLUMNS = ["id", "title", "genre", "page_count", "publication_year", "description", "cover_image", "authors"]
+
+
+def book_record(book: Book, include_reviews: bool) -> dict:
+    record = jsonable_encoder(BookSchema.from_orm(book))
+    if include_reviews:
+        record["reviews"] = jsonable_encoder([ReviewOut.from_orm(review) for review in book.reviews])
+    return record
+
+
+def csv_line(values: list) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
+
+async def iter_export(
+    db: AsyncSession,
+    fmt: str = "ndjson",
+    genre: Optional[str] = None,
+    author: Optional[str] = None,
+    include_reviews: bool = False,
+    batch_size: int = 500,
+) -> AsyncIterator[str]:
+    # yield_per streams through a server-side cursor, and the selectin loads for
+    # authors/reviews run once per batch. The session's identity map only holds
+    # weak references, so finished batches are freed and memory stays bounded
+    # by batch_size however large the catalogue is.
+    stmt = filter_books(book_select(), genre=genre, author=author).order_by(Book.id)
+    if include_reviews:
+        stmt = stmt.options(selectinload(Book.reviews))
+    result = await db.stream(stmt.execution_options(yield_per=batch_size))
+
+    if fmt == "csv":
+        # Same layout import_books.py reads, so an export can be re-imported.
+        yield csv_line(CSV_COLUMNS)
+    async for partition in result.scalars().partitions():
+        if fmt == "csv":
+            yield "".join(
+                csv_line(
+                    [getattr(book, column) for column in CSV_COLUMNS[:-1]]
+                    + ["; ".join(author.name for author in book.authors)]
+                )
+                for book in partition
+            )
+        else:
+            yield "".join(json.dumps(book_record(book, include_reviews)) + "\n" for book in partition)
+
+
+async def gzip_stream(chunks: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    async for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,87 @@
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from app.models.models import Author, Book, book_author_table
+
+# Fields of schemas.Book / schemas.Author, in schema order so projected
+# payloads serialize the same as the pydantic ones.
+BOOK_FIELDS = [
+    "title", "genre", "page_count", "publication_year", "description", "id", "authors",
+    "cover_image", "rating_count", "rating_average", "rating_histogram",
+]
+AUTHOR_FIELDS = ["name", "biography", "birth_date", "nationality", "id"]
+HISTOGRAM_COLUMNS = [f"rating_count_{star}" for star in range(1, 6)]
+
+
+class BookProjection:
+    # Reads only the columns a response needs as plain rows and builds dicts
+    # directly, skipping ORM identity-map work and pydantic validation.
+    # `id` is always included: cursors and the author lookup key on it.
+    def __init__(self, book_fields: Sequence[str] = BOOK_FIELDS, author_fields: Sequence[str] = AUTHOR_FIELDS):
+        self.book_fields = [f for f in BOOK_FIELDS if f in book_fields or f == "id"]
+        self.author_fields = [f for f in AUTHOR_FIELDS if f in author_fields]
+
+    @classmethod
+    def from_param(cls, fields: Optional[str]) -> "BookProjection":
+        # "id,title,authors.name" -> book fields plus the author fields after "authors.".
+        # Bare "authors" means every author field. Raises ValueError on unknown names.
+        if not fields:
+            return cls()
+        book_fields, author_fields = set(), set()
+        for name in (part.strip() for part in fields.split(",")):
+            if not name:
+                continue
+            if name.startswith("authors."):
+                sub = name[len("authors."):]
+                if sub not in AUTHOR_FIELDS:
+                    raise ValueError(f"Unknown field: {name}")
+                book_fields.add("authors")
+                author_fields.add(sub)
+            elif name in BOOK_FIELDS:
+                book_fields.add(name)
+                if name == "authors":
+                    author_fields.update(AUTHOR_FIELDS)
+            else:
+                raise ValueError(f"Unknown field: {name}")
+        return cls(book_fields, author_fields)
+
+    def select(self) -> Select:
+        columns = []
+        for field in self.book_fields:
+            if field == "rating_histogram":
+                columns += [getattr(Book, column) for column in HISTOGRAM_COLUMNS]
+            elif field != "authors":
+                columns.append(getattr(Book, field))
+        return select(*columns)
+
+    def _book(self, row) -> dict:
+        book = {}
+        for field in self.book_fields:
+            if field == "rating_histogram":
+                book[field] = {str(star): getattr(row, f"rating_count_{star}") or 0 for star in range(1, 6)}
+            elif field == "authors":
+                book[field] = []
+            elif field == "rating_count":
+                book[field] = row.rating_count or 0
+            else:
+                book[field] = getattr(row, field)
+        return book
+
+    async def fetch(self, db: AsyncSession, stmt: Select) -> List[dict]:
+        books = [self._book(row) for row in (await db.execute(stmt)).all()]
+        if books and "authors" in self.book_fields:
+            # One query for the whole page, like selectinload, but without ORM objects.
+            by_id: Dict[int, dict] = {book["id"]: book for book in books}
+            author_columns = [getattr(Author, field) for field in self.author_fields]
+            rows = await db.execute(
+                select(book_author_table.c.book_id, *author_columns)
+                .join(Author, Author.id == book_author_table.c.author_id)
+                .where(book_author_table.c.book_id.in_(list(by_id)))
+                .order_by(book_author_table.c.book_id, Author.id)
+            )
+            for row in rows.all():
+                by_id[row.book_id]["authors"].append({field: getattr(row, field) for field in self.author_fields})
+        return books
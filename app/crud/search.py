@@ -0,0 +1,56 @@
+import re
+from typing import List
+
+import sqlalchemy as sa
+from sqlalchemy.sql import Select
+
+from app.models.models import Book
+
+TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+books_fts = sa.table("books_fts", sa.column("rowid"), sa.column("rank"))
+
+
+def search_document_for(title: str, genre: str, description: str, author_names: List[str]) -> str:
+    parts = [title, genre, description] + list(author_names)
+    return " ".join(part for part in parts if part)
+
+
+def build_search_document(book: Book) -> str:
+    return search_document_for(book.title, book.genre, book.description, [author.name for author in book.authors])
+
+
+def search_terms(text: str) -> List[str]:
+    return TERM_RE.findall(text.lower())
+
+
+def apply_search(query: Select, dialect_name: str, text: str, ranked: bool = True) -> Select:
+    # Every term must match as a prefix. Postgres uses the GIN expression index on
+    # search_document, SQLite the books_fts FTS5 table, anything else ILIKE.
+    terms = search_terms(text)
+    if not terms:
+        return query.filter(sa.false())
+
+    if dialect_name == "postgresql":
+        # Must match the ix_books_search_document_fts expression exactly for the index to be used.
+        vector = sa.func.to_tsvector(
+            sa.literal_column("'simple'"), sa.func.coalesce(Book.search_document, sa.literal_column("''"))
+        )
+        ts_query = sa.func.to_tsquery(sa.literal_column("'simple'"), " & ".join(f"{t}:*" for t in terms))
+        query = query.filter(vector.op("@@")(ts_query))
+        if ranked:
+            query = query.order_by(sa.func.ts_rank(vector, ts_query).desc())
+        return query
+
+    if dialect_name == "sqlite":
+        match = " ".join(f'"{t}"*' for t in terms)
+        query = query.join(books_fts, books_fts.c.rowid == Book.id).filter(
+            sa.literal_column("books_fts").op("MATCH")(match)
+        )
+        if ranked:
+            query = query.order_by(books_fts.c.rank)
+        return query
+
+    for term in terms:
+        query = query.filter(Book.search_document.ilike(f"%{term}%"))
+    return query
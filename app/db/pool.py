@@ -0,0 +1,80 @@
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolWaitStats:
+    # Plain counters: a checkout already takes the pool's own lock, adding a
+    # second one here would only lengthen the critical path.
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, elapsed: float, timed_out: bool = False) -> None:
+        self.checkouts += 1
+        if timed_out:
+            self.timeouts += 1
+        self.wait_seconds_total += elapsed
+        if elapsed > self.wait_seconds_max:
+            self.wait_seconds_max = elapsed
+
+    def as_dict(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": round(self.wait_seconds_total, 6),
+            "wait_seconds_max": round(self.wait_seconds_max, 6),
+            "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+        }
+
+
+class WaitTimingMixin:
+    # One PoolWaitStats per pool, so the primary and each replica are counted
+    # apart. engine.dispose() replaces the pool through recreate(), which hands
+    # the stats on to the new instance.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+    def connect(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.wait_stats.record(time.perf_counter() - start, timed_out)
+
+
+class TimedQueuePool(WaitTimingMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(WaitTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_status(engine) -> dict:
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            # QueuePool reports unopened base connections as negative overflow.
+            overflow=max(pool.overflow(), 0),
+        )
+    if isinstance(pool, WaitTimingMixin):
+        status["wait"] = pool.wait_stats.as_dict()
+    return status
@@ -0,0 +1,114 @@
+import asyncio
+import itertools
+import math
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import settings
+from app.utils.utils import logger
+
+
+class ReplicaRouter:
+    # Picks the engine for a read-only request: replicas in round-robin order,
+    # skipping ones whose last health check failed, and the primary when there
+    # are none, all are down, or the caller wrote within the last
+    # sticky_seconds (read-your-writes). Writes are remembered in this process
+    # and, with a shared `store` (async get/set with a TTL, e.g. the Redis
+    # cache backend), for every worker: the next read may land on another one.
+    def __init__(self, primary: AsyncEngine, replicas: List[AsyncEngine], sticky_seconds: float = 5.0,
+                 check_interval: float = 5.0, max_sticky_keys: int = 100_000, store=None):
+        self.primary = primary
+        self.replicas = replicas
+        self.sticky_seconds = sticky_seconds
+        self.check_interval = check_interval
+        self.max_sticky_keys = max_sticky_keys
+        self.store = store
+        self.healthy: Dict[AsyncEngine, bool] = {replica: True for replica in replicas}
+        self._order = itertools.cycle(replicas)
+        self._writes: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.reads = {"primary": 0, "replica": 0}
+
+    async def engine_for_read(self, sticky_key: Optional[str] = None) -> AsyncEngine:
+        if self.replicas and not await self.is_sticky(sticky_key):
+            for _ in range(len(self.replicas)):
+                replica = next(self._order)
+                if self.healthy[replica]:
+                    self.reads["replica"] += 1
+                    return replica
+        self.reads["primary"] += 1
+        return self.primary
+
+    async def is_sticky(self, key: Optional[str]) -> bool:
+        if key is None:
+            return False
+        until = self._writes.get(key)
+        if until is not None and until > time.monotonic():
+            return True
+        return self.store is not None and await self.store.get(f"sticky:{key}") is not None
+
+    async def note_write(self, key: Optional[str]) -> None:
+        if key is None or not self.replicas:
+            return
+        now = time.monotonic()
+        if len(self._writes) >= self.max_sticky_keys:
+            self._writes = {k: until for k, until in self._writes.items() if until > now}
+        self._writes[key] = now + self.sticky_seconds
+        if self.store is not None:
+            await self.store.set(f"sticky:{key}", "1", ttl=max(1, math.ceil(self.sticky_seconds)))
+
+    def mark_down(self, engine: AsyncEngine) -> None:
+        if self.healthy.get(engine):
+            self.healthy[engine] = False
+            logger.warning("replica marked down until its next health check", extra={"replica": str(engine.url)})
+
+    async def check(self) -> None:
+        async def ping(replica: AsyncEngine) -> None:
+            try:
+                async with replica.connect() as conn:
+                    await asyncio.wait_for(conn.execute(text("SELECT 1")), timeout=self.check_interval)
+                self.healthy[replica] = True
+            except Exception:
+                self.mark_down(replica)
+
+        await asyncio.gather(*(ping(replica) for replica in self.replicas))
+
+    async def _run(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_interval)
+
+    def start(self) -> None:
+        if self.replicas and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.dispose()
+
+    def status(self) -> dict:
+        return {
+            "replicas": [{"url": replica.url.render_as_string(hide_password=True), "healthy": self.healthy[replica]}
+                         for replica in self.replicas],
+            "reads": dict(self.reads),
+        }
+
+
+def check_worker_count(workers: int) -> None:
+    # Without a shared store each worker only knows its own callers' writes,
+    # so a read served by another worker could go to a lagging replica.
+    if workers > 1 and settings.database_replica_urls.strip() and settings.cache_backend != "redis":
+        raise RuntimeError(
+            f"{workers} workers with read replicas need a shared store for read-your-writes: "
+            "set CACHE_BACKEND=redis and CACHE_URL, or run with WEB_WORKERS=1"
+        )
@@ -0,0 +1,252 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from starlette.concurrency import run_in_threadpool
+
+from app.cache.cache import response_cache
+from app.config import settings
+from app.crud import crud
+from app.db.db import AsyncSessionLocal
+from app.metrics.metrics import metrics
+from app.models.models import Job
+from app.storage import covers
+from app.utils.utils import log_info, logger
+
+Handler = Callable[..., Awaitable[None]]
+
+
+class UnknownJob(Exception):
+    pass
+
+
+class JobQueue:
+    # Runs work after the response has been sent: a bounded asyncio.Queue of
+    # job ids served by a few worker tasks in each process. Every job is a row
+    # in the jobs table before it is queued, so nothing is lost when the queue
+    # is full or the process dies; the poller queues due rows again and a
+    # worker claims one with a conditional UPDATE, so only one process runs
+    # it. A job can still run twice (a worker dying after the handler
+    # committed), so handlers must be idempotent.
+    def __init__(self, session_factory, workers: int = 2, max_size: int = 1000, max_attempts: int = 5,
+                 retry_delay: float = 1.0, poll_interval: float = 5.0, lease_seconds: float = 300.0):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.max_size = max_size
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.handlers: Dict[str, Handler] = {}
+        self.queue: Optional[asyncio.Queue] = None
+        self._queued: Set[int] = set()
+        self._tasks: List[asyncio.Task] = []
+
+    def handler(self, name: str):
+        # Handlers are called as handler(db, **payload); the payload must be JSON.
+        def register(func: Handler) -> Handler:
+            self.handlers[name] = func
+            return func
+        return register
+
+    @property
+    def depth(self) -> int:
+        return self.queue.qsize() if self.queue is not None else 0
+
+    def add(self, db, name: str, **payload) -> Job:
+        # Outbox: the job row is added to the caller's session and commits or
+        # rolls back with the write it belongs to. Pass it to offer() after the commit.
+        if name not in self.handlers:
+            raise UnknownJob(f"Unknown job {name!r}")
+        job = Job(name=name, payload=json.dumps(payload))
+        db.add(job)
+        return job
+
+    def offer(self, job: Job) -> None:
+        self._offer(job.id)
+
+    async def enqueue(self, name: str, **payload) -> Optional[int]:
+        # For work that may be lost: the job is saved in its own transaction
+        # after the request's commit, and a failure is logged rather than raised,
+        # so it cannot turn a write that already happened into a 500.
+        try:
+            async with self.session_factory() as db:
+                job = self.add(db, name, **payload)
+                await db.commit()
+        except SQLAlchemyError:
+            logger.exception("job could not be saved", extra={"job": name})
+            return None
+        self.offer(job)
+        return job.id
+
+    def _offer(self, job_id: int) -> None:
+        if self.queue is None or job_id in self._queued:
+            return
+        try:
+            self.queue.put_nowait(job_id)
+        except asyncio.QueueFull:
+            # Stays pending in the table; the poller queues it once there is room.
+            return
+        self._queued.add(job_id)
+
+    def _claimable(self, now: datetime):
+        return or_(
+            and_(Job.status == "pending", Job.run_after <= now),
+            and_(Job.status == "running", Job.locked_at < now - timedelta(seconds=self.lease_seconds)),
+        )
+
+    async def run(self, job_id: int) -> None:
+        now = datetime.utcnow()
+        async with self.session_factory() as db:
+            claimed = await db.execute(
+                update(Job)
+                .where(Job.id == job_id, self._claimable(now))
+                .values(status="running", locked_at=now, attempts=Job.attempts + 1)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            if claimed.rowcount != 1:
+                return
+            job = await db.get(Job, job_id)
+            name, payload, attempts, created_at = job.name, json.loads(job.payload), job.attempts, job.created_at
+
+            started = time.perf_counter()
+            try:
+                handler = self.handlers.get(name)
+                if handler is None:
+                    raise UnknownJob(f"No handler registered for {name!r}")
+                await handler(db, **payload)
+            except Exception as e:
+                await db.rollback()
+                run_seconds = time.perf_counter() - started
+                retry = attempts < self.max_attempts and not isinstance(e, UnknownJob)
+                delay = self.retry_delay * 2 ** (attempts - 1)
+                await db.execute(
+                    update(Job)
+                    .where(Job.id == job_id)
+                    .values(
+                        status="pending" if retry else "failed",
+                        run_after=datetime.utcnow() + timedelta(seconds=delay),
+                        locked_at=None,
+                        last_error=f"{type(e).__name__}: {e}",
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+                logger.warning(
+                    "job failed, retrying" if retry else "job failed, giving up",
+                    exc_info=True,
+                    extra={"job": name, "job_id": job_id, "attempts": attempts},
+                )
+                if retry:
+                    metrics.job_finished(name, "retry", run_seconds, 0.0)
+                    asyncio.get_running_loop().call_later(delay, self._offer, job_id)
+                else:
+                    metrics.job_finished(name, "failed", run_seconds, (datetime.utcnow() - created_at).total_seconds())
+                return
+
+            run_seconds = time.perf_counter() - started
+            await db.execute(delete(Job).where(Job.id == job_id))
+            await db.commit()
+            metrics.job_finished(name, "done", run_seconds, (datetime.utcnow() - created_at).total_seconds())
+
+    async def requeue(self) -> int:
+        # Fills free queue slots with due jobs: ones that did not fit, retries,
+        # leftovers from a restart and jobs whose worker died mid-run.
+        free = self.max_size - self.depth
+        if self.queue is None or free <= 0:
+            return 0
+        async with self.session_factory() as db:
+            job_ids = (await db.scalars(
+                select(Job.id).where(self._claimable(datetime.utcnow())).order_by(Job.id).limit(free)
+            )).all()
+        for job_id in job_ids:
+            self._offer(job_id)
+        return len(job_ids)
+
+    async def _work(self) -> None:
+        while True:
+            job_id = await self.queue.get()
+            try:
+                await self.run(job_id)
+            except Exception:
+                # The job row itself could not be updated; the poller retries it after the lease.
+                logger.exception("job bookkeeping failed", extra={"job_id": job_id})
+            finally:
+                self._queued.discard(job_id)
+                self.queue.task_done()
+
+    async def _poll(self) -> None:
+        while True:
+            try:
+                await self.requeue()
+            except SQLAlchemyError:
+                logger.exception("job poll failed")
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self) -> None:
+        if self.queue is not None or self.workers <= 0:
+            return
+        self.queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._poll()))
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        # Gives queued jobs a moment to finish; whatever is left stays in the
+        # table and is picked up by the next process to start.
+        if self.queue is None:
+            return
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            log_info("job queue stopped with work left", depth=self.depth)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.queue = None
+        self._queued.clear()
+
+    async def stats(self) -> dict:
+        async with self.session_factory() as db:
+            rows = (await db.execute(select(Job.status, func.count()).group_by(Job.status))).all()
+        return {
+            "workers": self.workers if self.queue is not None else 0,
+            "queue_depth": self.depth,
+            "queue_size": self.max_size,
+            "jobs": {status: count for status, count in rows},
+        }
+
+
+job_queue = JobQueue(
+    AsyncSessionLocal,
+    workers=settings.job_workers,
+    max_size=settings.job_queue_size,
+    max_attempts=settings.job_max_attempts,
+    retry_delay=settings.job_retry_delay,
+    poll_interval=settings.job_poll_interval,
+    lease_seconds=settings.job_lease_seconds,
+)
+
+
+@job_queue.handler("covers.thumbnails")
+async def generate_thumbnails(db, cover_name: str) -> None:
+    await run_in_threadpool(covers.generate_thumbnails, cover_name)
+
+
+@job_queue.handler("covers.cleanup")
+async def remove_cover(db, cover_image: Optional[str], book_id: int) -> None:
+    await covers.remove_cover_if_unused(db, cover_image, book_id)
+
+
+@job_queue.handler("books.recompute_ratings")
+async def recompute_ratings(db, book_ids: List[int]) -> None:
+    await crud.recompute_book_ratings(db, book_ids)
+    # Invalidated after the new aggregates commit, so rebuilt pages pick them up.
+    for book_id in book_ids:
+        await response_cache.invalidate_reviews(book_id)
+        await response_cache.invalidate_book(book_id)
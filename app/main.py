@@ -1,61 +1,123 @@
-import traceback
-print("STARTING FASTAPI MAIN")
-
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Query, Form, Body, Path, status, Request
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
-from typing import List, Optional
-import shutil
+from fastapi import (
+    FastAPI, Depends, HTTPException, UploadFile, File, Query, Form, Body, Path, status, Request,
+    Header,
+)
+from fastapi.responses import JSONResponse, Response, StreamingResponse, FileResponse, PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
+from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
+import asyncio
 import os
 import json
+import time
 
 import app.utils as utils
-from app.crud import crud
+from app.utils.pagination import decode_cursor, split_page
+from app.crud import crud, bulk, export
+from app.crud.projection import BookProjection
+from app.config import settings
 from app.schemas import schemas
 from app.models import models
-from app.db.db import SessionLocal, engine, Base
+from app.db.db import (
+    async_engine, engine_pools, get_db, get_read_db, on_replica, sticky_key, replica_router, AsyncSessionLocal
+)
+from app.db.pool import pool_status
+from app.cache.cache import response_cache, dump_json
+from app.utils.json_utils import dumps, FastJSONResponse
+from app.utils.conditional_utils import conditional_response, http_date, pack, parse_if_match
+from app.utils.password_utils import password_hasher
+from app.utils.jwt_utils import token_cache
+from app.utils.logging_utils import (
+    setup_logging, shutdown_logging, new_request_id, request_id_var, should_log_request
+)
+from app.storage import covers
+from app.jobs.jobs import job_queue
+from app.revocations.revocations import revocation_feed
+from app.ratelimit.ratelimit import (
+    RateLimitMiddleware, parse_policies, create_backend as create_rate_limit_backend
+)
+from app.metrics.metrics import metrics, render_prometheus
+from app.compression.compression import CompressionMiddleware, compressor
 
 from app.api.routers.users import router as users_router
-from app.api.routers import reviews
+from app.api.routers import reviews, authors
 from app.dependencies.dependencies import get_current_user
 
-Base.metadata.create_all(bind=engine)
+async def warm_up() -> None:
+    # Open pooled connections and run the hot queries once, so the first real
+    # requests find connections, compiled SQL and prepared statements ready.
+    async def touch():
+        async with AsyncSessionLocal() as db:
+            await crud.get_books(db, limit=1, projection=BookProjection())
+            await crud.get_book(db, 1)
 
-app = FastAPI(title="Book Library Management API")
+    await asyncio.gather(*(touch() for _ in range(max(1, settings.warmup_connections))))
+    await run_in_threadpool(password_hasher.warm_up)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs in every worker after the fork, so nothing here is shared with the
+    # preloading master. Schema creation is not done here: run migrations first.
+    started = time.perf_counter()
+    setup_logging()
+    try:
+        await warm_up()
+    except Exception:
+        utils.logger.exception("warm-up failed; serving cold")
+    replica_router.start()
+    await revocation_feed.start()
+    # Also picks up jobs left pending by earlier processes.
+    job_queue.start()
+    utils.log_info("startup complete", duration_ms=round((time.perf_counter() - started) * 1000, 2), pid=os.getpid())
+    yield
+    await job_queue.stop(settings.job_shutdown_timeout)
+    await revocation_feed.stop()
+    await replica_router.stop()
+    password_hasher.shutdown()
+    await async_engine.dispose()
+    shutdown_logging()
+
+
+app = FastAPI(title="Book Library Management API", default_response_class=FastJSONResponse, lifespan=lifespan)
+
+# Added first, so it is the innermost middleware and the logged duration includes compression.
+if settings.compression_enabled:
+    app.add_middleware(CompressionMiddleware, compressor=compressor)
+
+# Added before the logging middleware so it sits inside it: 429s are logged and counted too.
+if settings.rate_limit_enabled:
+    app.add_middleware(
+        RateLimitMiddleware,
+        policies=parse_policies(settings.rate_limit_policies),
+        backend=create_rate_limit_backend(),
+    )
 
 @app.get("/ping")
 def ping():
-    print("Ping endpoint called")
     return {"message": "pong"}
 
 
 app.include_router(users_router, prefix="/users", tags=["users"])
 app.include_router(reviews.router)
-
-
-STATIC_DIR = "../static"
-os.makedirs(STATIC_DIR, exist_ok=True)
-
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+app.include_router(authors.router)
 
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
-    print(f"Unhandled exception: {exc}")
-    traceback.print_exc()
+    utils.logger.error(
+        f"Unhandled exception: {exc}",
+        exc_info=(type(exc), exc, exc.__traceback__),
+        extra={"method": request.method, "path": request.url.path},
+    )
     return JSONResponse(
         status_code=500,
         content={"detail": "Internal Server Error"}
     )
 
 
-def admin_required(current_user: schemas.TokenData = Depends(get_current_user)):
+async def admin_required(current_user: schemas.TokenData = Depends(get_current_user)):
     if not hasattr(current_user, "role") or current_user.role.lower() != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -64,109 +126,292 @@ def admin_required(current_user: schemas.TokenData = Depends(get_current_user)):
     return current_user
 
 
+# Logging and metrics share one middleware: each BaseHTTPMiddleware layer costs
+# an extra task and stream per request.
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    utils.log_info(f"Incoming request: {request.method} {request.url}")
-    response = await call_next(request)
-    utils.log_info(f"Completed request: {request.method} {request.url} with status {response.status_code}")
-    return response
+    request_id = new_request_id(request.headers.get("x-request-id"))
+    token = request_id_var.set(request_id)
+    method = request.method
+    db_stats = metrics.request_started(method)
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        if method not in ("GET", "HEAD", "OPTIONS") and status_code < 400:
+            # Pin this caller's reads to the primary until replicas catch up.
+            await replica_router.note_write(sticky_key(request))
+        response.headers["X-Request-ID"] = request_id
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        route = request.scope.get("route")
+        metrics.request_finished(method, route.path if route else "unmatched", status_code, elapsed, db_stats)
+        path = request.url.path
+        duration_ms = elapsed * 1000
+        if should_log_request(method, path, status_code, duration_ms):
+            utils.log_info(
+                "request completed",
+                method=method,
+                path=path,
+                status=status_code,
+                duration_ms=round(duration_ms, 2),
+                db_queries=db_stats[0],
+                db_ms=round(db_stats[1] * 1000, 2),
+            )
+        request_id_var.reset(token)
 
 
 @app.post("/books/", response_model=schemas.Book)
-def create_book(
+async def create_book(
     book: str = Form(...),
     cover_image: Optional[UploadFile] = File(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: schemas.TokenData = Depends(get_current_user),
 ):
-    print("Create book endpoint called")
-    print("Raw book data string:", book)
-
     try:
         book_data = json.loads(book)
-        print("Parsed book data:", book_data)
         book_obj = schemas.BookCreate(**book_data)
     except Exception as e:
-        print("Error parsing book data:", e)
         raise HTTPException(status_code=400, detail=f"Invalid book data: {str(e)}")
+    if book_obj.cover_image:
+        # The cover comes from the file part only, never from the JSON.
+        raise HTTPException(status_code=400, detail="Invalid book data: upload the cover as the cover_image file")
+
+    if cover_image:
+        try:
+            book_obj.cover_image, _ = await covers.save_cover(cover_image)
+        except covers.InvalidCover as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
     try:
-        if cover_image:
-            file_location = f"{STATIC_DIR}/{cover_image.filename}"
-            with open(file_location, "wb") as buffer:
-                shutil.copyfileobj(cover_image.file, buffer)
-            book_obj.cover_image = file_location
-
-        created_book = crud.create_book(db, book_obj)
-        utils.log_info(f"Created book '{created_book.title}' by authors {[author.name for author in created_book.authors]}")
-        return created_book
+        created_book = await crud.create_book(db, book_obj)
+        utils.log_info("book created", book_id=created_book.id)
     except Exception as e:
-        print("Error creating book:", e)
+        utils.logger.exception("book creation failed")
         raise HTTPException(status_code=500, detail=f"Internal error creating book: {str(e)}")
+    if book_obj.cover_image:
+        # Also for a cover that was already stored: thumbnails that are missing
+        # (a failed run, a new width) are made, existing ones are skipped.
+        await job_queue.enqueue("covers.thumbnails", cover_name=covers.cover_name(book_obj.cover_image))
+    return created_book
+
+
+@app.post("/books/import", response_model=schemas.BookImportReport)
+async def import_books(
+    file: UploadFile = File(..., description="NDJSON (one BookCreate per line) or CSV with ';'-separated authors"),
+    format: Optional[str] = Query(None, regex="^(ndjson|csv)$", description="Defaults from the file extension"),
+    chunk_size: int = Query(settings.import_chunk_size, ge=1, le=10000),
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.TokenData = Depends(admin_required),
+):
+    fmt = format or ("csv" if (file.filename or "").lower().endswith(".csv") else "ndjson")
+    report = await bulk.import_books(db, bulk.iter_import_rows(file.file, fmt), chunk_size)
+    utils.log_info("books imported", upload_name=file.filename, imported=report.imported, failed=report.failed)
+    return report.as_dict()
 
 
-@app.get("/books/", response_model=List[schemas.Book])
-def list_books(
+@app.get("/books/", response_model=Union[List[schemas.Book], schemas.BookPage])
+async def list_books(
     skip: int = 0,
     limit: int = 10,
     search: Optional[str] = Query(None, description="Search by title or author"),
     genre: Optional[str] = Query(None),
     author: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    sort: Optional[str] = Query(None, regex="^(rating|popularity)$", description="Order by average rating or review count"),
+    cursor: Optional[str] = Query(
+        None,
+        description="Cursor pagination: pass an empty value for the first page, then the returned next_cursor",
+    ),
+    fields: Optional[str] = Query(
+        None, description="Sparse fieldset, e.g. id,title,authors.name (id is always returned)"
+    ),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: schemas.TokenData = Depends(get_current_user),
+):
+    if sort and (cursor is not None or search):
+        raise HTTPException(status_code=400, detail="sort cannot be combined with search or cursor pagination")
+    try:
+        projection = BookProjection.from_param(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Pages are read as projected dicts and encoded directly; no ORM objects or
+    # pydantic models are built on this path.
+    async def build() -> str:
+        if cursor is None:
+            if search:
+                return dumps(await crud.search_books(db, search, skip, limit, projection=projection))
+            return dumps(await crud.get_books(db, skip, limit, genre=genre, author=author, sort=sort,
+                                              projection=projection))
+
+        try:
+            after_id = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if search:
+            rows = await crud.search_books(db, search, limit=limit + 1, after_id=after_id, ranked=False,
+                                           projection=projection)
+        else:
+            rows = await crud.get_books(db, limit=limit + 1, genre=genre, author=author, after_id=after_id,
+                                        projection=projection)
+        items, next_cursor = split_page(rows, limit)
+        return dumps({"items": items, "next_cursor": next_cursor})
+
+    params = (f"skip={skip}&limit={limit}&search={search}&genre={genre}&author={author}&sort={sort}"
+              f"&cursor={cursor}&fields={','.join(projection.book_fields)}:{','.join(projection.author_fields)}")
+    key = await response_cache.book_list_key(params)
+    payload = await response_cache.get_or_set(key, build, store=not on_replica(db))
+    return Response(content=payload, media_type="application/json")
+
+
+@app.get("/books/export")
+async def export_books(
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    genre: Optional[str] = Query(None),
+    author: Optional[str] = Query(None),
+    include_reviews: bool = Query(False, description="Embed reviews in NDJSON records"),
+    gzip: bool = Query(False, description="Send a .gz file instead of plain text"),
     current_user: schemas.TokenData = Depends(get_current_user),
 ):
-    if search:
-        return crud.search_books(db, search, skip, limit)
+    async def body():
+        # The stream outlives this handler, so it owns its session instead of using get_read_db.
+        async with AsyncSessionLocal(bind=await replica_router.engine_for_read()) as db:
+            async for chunk in export.iter_export(
+                db, format, genre=genre, author=author, include_reviews=include_reviews and format == "ndjson"
+            ):
+                yield chunk
+
+    filename = f"books.{format}"
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    content = body()
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+        content = export.gzip_stream(content)
+    return StreamingResponse(
+        content, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 
-    query = db.query(models.Book)
-    if genre:
-        query = query.filter(models.Book.genre.ilike(f"%{genre}%"))
-    if author:
-        query = query.join(models.Book.authors).filter(models.Author.name.ilike(f"%{author}%"))
-    books = query.offset(skip).limit(limit).all()
-    return books
+def book_etag(book: models.Book) -> str:
+    # Strong, so it can be used in If-Match; the compression middleware
+    # weakens it for clients that negotiated an encoding, 304s included.
+    return f'"book-{book.id}-v{book.version}"'
 
 
 @app.get("/books/{book_id}", response_model=schemas.Book)
-def get_book(
+async def get_book(
+    request: Request,
     book_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: schemas.TokenData = Depends(get_current_user),
 ):
-    book = crud.get_book(db, book_id)
-    if not book:
-        raise HTTPException(status_code=404, detail="Book not found")
-    return book
+    async def build() -> str:
+        book = await crud.get_book(db, book_id)
+        if not book:
+            raise HTTPException(status_code=404, detail="Book not found")
+        return pack(book_etag(book), http_date(book.updated_at), dump_json(schemas.Book, book))
+
+    cached = await response_cache.get_or_set(response_cache.book_key(book_id), build, store=not on_replica(db))
+    return conditional_response(request, cached)
+
+
+@app.get("/covers/{name}")
+async def get_cover(request: Request, name: str, size: Optional[int] = Query(None, ge=1)):
+    found = covers.resolve_cover_file(name, size)
+    if not found:
+        raise HTTPException(status_code=404, detail="Cover not found")
+    path, etag, final = found
+    etag = f'"{etag}"'
+    # Content-addressed files never change, so they can be cached forever.
+    cache_control = f"public, max-age={settings.cover_cache_max_age}, immutable" if final else "public, max-age=60"
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    media_type = covers.MEDIA_TYPES.get(os.path.splitext(path)[1], "application/octet-stream")
+    return FileResponse(path, media_type=media_type, headers=headers)
 
 
 @app.delete("/books/{book_id}")
-def delete_book(
+async def delete_book(
     book_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: schemas.TokenData = Depends(admin_required),
 ):
-    book = crud.get_book(db, book_id)
+    book = await crud.get_book(db, book_id)
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
 
-    if book.cover_image and os.path.isfile(book.cover_image):
-        os.remove(book.cover_image)
-
-    crud.delete_book(db, book_id)
-    utils.log_info(f"Deleted book id {book_id}")
+    # The cleanup job commits with the delete, so a crash in between cannot orphan the file.
+    job = None
+    if book.cover_image:
+        job = job_queue.add(db, "covers.cleanup", cover_image=book.cover_image, book_id=book_id)
+    if await crud.delete_book(db, book_id) and job is not None:
+        job_queue.offer(job)
+    utils.log_info("book deleted", book_id=book_id)
     return {"detail": "Book deleted successfully"}
 
 
 @app.patch("/books/{book_id}", response_model=schemas.Book)
-def update_book(
+async def update_book(
     book_id: int = Path(..., description="ID of the book to update"),
     book_update: schemas.BookUpdate = Body(...),
-    db: Session = Depends(get_db),
+    if_match: Optional[str] = Header(None, description="ETag from GET /books/{book_id}; 412 if the book changed"),
+    db: AsyncSession = Depends(get_db),
     current_user: schemas.TokenData = Depends(admin_required),
 ):
-    existing_book = crud.get_book(db, book_id)
-    if not existing_book:
+    try:
+        expected_version = parse_if_match(if_match, f"book-{book_id}-v")
+        updated_book = await crud.update_book(db, book_id, book_update, expected_version)
+    except (ValueError, crud.BookVersionConflict):
+        raise HTTPException(status_code=412, detail="Book was modified; fetch it again and retry")
+    if not updated_book:
         raise HTTPException(status_code=404, detail="Book not found")
+    return Response(
+        content=dump_json(schemas.Book, updated_book),
+        media_type="application/json",
+        headers={"ETag": book_etag(updated_book), "Last-Modified": http_date(updated_book.updated_at)},
+    )
+
 
-    updated_book = crud.update_book(db, book_id, book_update)
-    return updated_book
+@app.get("/cache/stats")
+async def cache_stats(current_user: schemas.TokenData = Depends(admin_required)):
+    return response_cache.stats()
+
+
+@app.get("/db/pool")
+async def db_pool_stats(current_user: schemas.TokenData = Depends(admin_required)):
+    return {**pool_status(async_engine), **replica_router.status(), "pools": engine_pools()}
+
+
+@app.get("/jobs/stats")
+async def job_stats(current_user: schemas.TokenData = Depends(admin_required)):
+    return await job_queue.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    tokens = token_cache.stats()
+    body = render_prometheus(
+        engine_pools(),
+        response_cache.stats(),
+        extra=[
+            ("password_hash_pending", "gauge", "Password hash jobs in flight.", password_hasher.pending),
+            ("jwt_cache_hits_total", "counter", "Decoded-token cache hits.", tokens["hits"]),
+            ("jwt_cache_misses_total", "counter", "Decoded-token cache misses.", tokens["misses"]),
+            ("jwt_revoked_tokens", "gauge", "Revoked tokens not yet expired.", tokens["revoked"]),
+            ("db_replicas_healthy", "gauge", "Read replicas passing health checks.",
+             sum(replica_router.healthy.values())),
+            ("db_replica_reads_total", "counter", "Read sessions bound to a replica.", replica_router.reads["replica"]),
+            ("job_queue_depth", "gauge", "Background jobs queued in this process.", job_queue.depth),
+            ("http_compressed_responses_total", "counter", "Responses sent compressed.", compressor.responses),
+            ("http_compression_cache_hits_total", "counter", "Compressed bodies served from the cache.",
+             compressor.cache_hits),
+            ("http_compression_bytes_in_total", "counter", "Body bytes before compression.", compressor.bytes_in),
+            ("http_compression_bytes_out_total", "counter", "Body bytes after compression.", compressor.bytes_out),
+            ("http_compression_seconds_total", "counter", "Time spent compressing bodies.", compressor.seconds),
+        ],
+    )
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
@@ -0,0 +1,193 @@
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+# Counters are plain ints mutated from the event loop thread (and, for the
+# engine hooks, from whichever thread runs the query). Under the GIL each
+# update is effectively atomic for our purposes and no lock is taken.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+JOB_LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 1800.0)
+
+# [query count, query seconds] for the request being served.
+request_db_stats: ContextVar[Optional[List[float]]] = ContextVar("request_db_stats", default=None)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    def __init__(self):
+        self.request_latency: Dict[Tuple[str, str], Histogram] = {}
+        self.request_queries: Dict[Tuple[str, str], Histogram] = {}
+        self.responses: Dict[Tuple[str, str, int], int] = defaultdict(int)
+        self.in_flight: Dict[str, int] = defaultdict(int)
+        self.db_queries = 0
+        self.db_query_seconds = 0.0
+        # Per job name: run time of the handler, and enqueue-to-finish latency.
+        self.job_duration: Dict[str, Histogram] = {}
+        self.job_latency: Dict[str, Histogram] = {}
+        self.jobs: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    def request_started(self, method: str) -> List[float]:
+        self.in_flight[method] += 1
+        stats = [0, 0.0]
+        request_db_stats.set(stats)
+        return stats
+
+    def request_finished(self, method: str, route: str, status: int, seconds: float, db_stats: List[float]) -> None:
+        self.in_flight[method] -= 1
+        key = (method, route)
+        latency = self.request_latency.get(key)
+        if latency is None:
+            latency = self.request_latency[key] = Histogram(LATENCY_BUCKETS)
+            self.request_queries[key] = Histogram(QUERY_COUNT_BUCKETS)
+        latency.observe(seconds)
+        self.request_queries[key].observe(db_stats[0])
+        self.responses[(method, route, status)] += 1
+
+    def job_finished(self, name: str, outcome: str, run_seconds: float, latency_seconds: float) -> None:
+        self.jobs[(name, outcome)] += 1
+        if outcome == "retry":
+            return
+        if name not in self.job_duration:
+            self.job_duration[name] = Histogram(JOB_LATENCY_BUCKETS)
+            self.job_latency[name] = Histogram(JOB_LATENCY_BUCKETS)
+        self.job_duration[name].observe(run_seconds)
+        self.job_latency[name].observe(latency_seconds)
+
+    def query_finished(self, seconds: float) -> None:
+        self.db_queries += 1
+        self.db_query_seconds += seconds
+        stats = request_db_stats.get()
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += seconds
+
+
+metrics = Metrics()
+
+
+def instrument_engine(engine) -> None:
+    # Pass AsyncEngine.sync_engine for async engines; cursor events fire on the sync core.
+    # A connection runs one statement at a time, so a single start time is
+    # enough; a statement that fails never reaches after_cursor_execute and
+    # its start is simply overwritten by the next one.
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_start"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_start", None)
+        if started is not None:
+            metrics.query_finished(time.perf_counter() - started)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    body = ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+    return "{" + body + "}" if body else ""
+
+
+def _histogram_lines(name: str, histogram: Histogram, **labels) -> List[str]:
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        cumulative += count
+        lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}")
+    lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {histogram.count}")
+    lines.append(f"{name}_sum{_labels(**labels)} {histogram.sum}")
+    lines.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+    return lines
+
+
+def _gauge_block(name: str, kind: str, help_text: str, samples: List[Tuple[dict, float]]) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{_labels(**labels)} {value}" for labels, value in samples)
+    return lines
+
+
+def render_prometheus(pools: Dict[str, dict], cache: dict,
+                      extra: Optional[List[Tuple[str, str, str, float]]] = None) -> str:
+    # Snapshot copies keep iteration safe while requests keep updating the dicts.
+    lines: List[str] = []
+
+    lines += ["# HELP http_request_duration_seconds Request latency by route.",
+              "# TYPE http_request_duration_seconds histogram"]
+    for (method, route), histogram in list(metrics.request_latency.items()):
+        lines += _histogram_lines("http_request_duration_seconds", histogram, method=method, route=route)
+
+    lines += ["# HELP http_request_db_queries Database queries issued per request.",
+              "# TYPE http_request_db_queries histogram"]
+    for (method, route), histogram in list(metrics.request_queries.items()):
+        lines += _histogram_lines("http_request_db_queries", histogram, method=method, route=route)
+
+    lines += _gauge_block(
+        "http_responses_total", "counter", "Responses by route and status code.",
+        [({"method": m, "route": r, "status": s}, n) for (m, r, s), n in list(metrics.responses.items())],
+    )
+    lines += _gauge_block(
+        "http_requests_in_flight", "gauge", "Requests currently being served.",
+        [({"method": m}, n) for m, n in list(metrics.in_flight.items())],
+    )
+    lines += _gauge_block("db_queries_total", "counter", "SQL statements executed.", [({}, metrics.db_queries)])
+    lines += _gauge_block(
+        "db_query_seconds_total", "counter", "Time spent executing SQL statements.", [({}, metrics.db_query_seconds)]
+    )
+
+    # One sample per engine (primary, replica-1, ...), so a starved pool can be told apart.
+    for key in ("size", "checked_out", "checked_in", "overflow"):
+        samples = [({"engine": name}, pool[key]) for name, pool in pools.items() if key in pool]
+        if samples:
+            lines += _gauge_block(f"db_pool_{key}", "gauge", f"Connection pool {key.replace('_', ' ')}.", samples)
+    waits = [({"engine": name}, pool["wait"]) for name, pool in pools.items() if pool.get("wait")]
+    if waits:
+        lines += _gauge_block("db_pool_checkouts_total", "counter", "Connection checkouts.",
+                              [(labels, wait["checkouts"]) for labels, wait in waits])
+        lines += _gauge_block("db_pool_timeouts_total", "counter", "Checkouts that timed out.",
+                              [(labels, wait["timeouts"]) for labels, wait in waits])
+        lines += _gauge_block("db_pool_wait_seconds_total", "counter", "Time spent waiting for a connection.",
+                              [(labels, wait["wait_seconds_total"]) for labels, wait in waits])
+        lines += _gauge_block("db_pool_wait_seconds_max", "gauge", "Longest wait for a connection.",
+                              [(labels, wait["wait_seconds_max"]) for labels, wait in waits])
+
+    lines += ["# HELP job_duration_seconds Background job handler run time.",
+              "# TYPE job_duration_seconds histogram"]
+    for name, histogram in list(metrics.job_duration.items()):
+        lines += _histogram_lines("job_duration_seconds", histogram, job=name)
+    lines += ["# HELP job_latency_seconds Time from enqueue until a job succeeded or gave up.",
+              "# TYPE job_latency_seconds histogram"]
+    for name, histogram in list(metrics.job_latency.items()):
+        lines += _histogram_lines("job_latency_seconds", histogram, job=name)
+    lines += _gauge_block(
+        "jobs_total", "counter", "Background job runs by outcome (done, retry, failed).",
+        [({"job": j, "outcome": o}, n) for (j, o), n in list(metrics.jobs.items())],
+    )
+
+    lines += _gauge_block("cache_hits_total", "counter", "Response cache hits.", [({}, cache["hits"])])
+    lines += _gauge_block("cache_misses_total", "counter", "Response cache misses.", [({}, cache["misses"])])
+
+    for name, kind, help_text, value in extra or []:
+        lines += _gauge_block(name, kind, help_text, [({}, value)])
+    return "\n".join(lines) + "\n"
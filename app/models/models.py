@@ -1,8 +1,9 @@
 from sqlalchemy import (
-    Table, Column, Integer, String, Boolean, ForeignKey, Date, Text, DateTime
+    Table, Column, Integer, String, Boolean, ForeignKey, Date, Text, DateTime, Float, Index, DDL, event
 )
 from sqlalchemy.orm import relationship
 import sqlalchemy as sa
+from datetime import datetime
 from app.db.db import Base
 
 
@@ -11,6 +12,8 @@ book_author_table = Table(
     Base.metadata,
     Column("book_id", Integer, ForeignKey("books.id", ondelete="CASCADE"), primary_key=True),
     Column("author_id", Integer, ForeignKey("authors.id", ondelete="CASCADE"), primary_key=True),
+    # The primary key leads with book_id; author -> books lookups need their own index.
+    Index("ix_book_author_author_id", "author_id"),
 )
 
 class Author(Base):
@@ -28,6 +31,11 @@ class Author(Base):
         back_populates="authors"
     )
 
+    __table_args__ = (
+        # Authors are looked up by name on every book write; one row per name, ignoring case.
+        Index("ux_authors_name_lower", sa.func.lower(name), unique=True),
+    )
+
 class Book(Base):
     __tablename__ = "books"
 
@@ -38,6 +46,27 @@ class Book(Base):
     publication_year = Column(Integer, nullable=False)
     description = Column(Text, nullable=False)
     cover_image = Column(String, nullable=True)
+    # Title, genre, description and author names flattened into one string by
+    # crud so the full-text index can cover authors without a join.
+    search_document = Column(Text, nullable=True)
+
+    # Review aggregates, so reads never have to scan `reviews`. Single reviews
+    # update them in the same transaction as the insert; bulk imports commit a
+    # books.recompute_ratings job with the reviews, which rebuilds them shortly after.
+    rating_count = Column(Integer, nullable=False, default=0, server_default="0", index=True)
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_average = Column(Float, nullable=True, index=True)
+    rating_count_1 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_count_2 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_count_3 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_count_4 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_count_5 = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Bumped on every write, including rating changes, and used as the ETag.
+    # The mapper checks it on UPDATE, so a stale write raises StaleDataError.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
+                        server_default=sa.func.now())
 
     authors = relationship(
         "Author",
@@ -46,6 +75,44 @@ class Book(Base):
     )
     reviews = relationship("Review", back_populates="book", cascade="all, delete-orphan")
 
+    @property
+    def rating_histogram(self):
+        return {str(star): getattr(self, f"rating_count_{star}") or 0 for star in range(1, 6)}
+
+    __mapper_args__ = {"version_id_col": version}
+
+    __table_args__ = (
+        Index(
+            "ix_books_search_document_fts",
+            sa.func.to_tsvector(
+                sa.literal_column("'simple'"), sa.func.coalesce(search_document, sa.literal_column("''"))
+            ),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+        Index("ix_books_genre_lower", sa.func.lower(genre)),
+    )
+
+
+# SQLite has no tsvector; an external-content FTS5 table kept in sync by
+# triggers gives the same ranked prefix search for local runs and tests.
+BOOKS_FTS_SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5("
+    "search_document, content='books', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books BEGIN "
+    "INSERT INTO books_fts(rowid, search_document) VALUES (new.id, new.search_document); END",
+    "CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books BEGIN "
+    "INSERT INTO books_fts(books_fts, rowid, search_document) VALUES ('delete', old.id, old.search_document); END",
+    "CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE OF search_document ON books BEGIN "
+    "INSERT INTO books_fts(books_fts, rowid, search_document) VALUES ('delete', old.id, old.search_document); "
+    "INSERT INTO books_fts(rowid, search_document) VALUES (new.id, new.search_document); END",
+]
+
+for _statement in BOOKS_FTS_SQLITE_DDL:
+    event.listen(Book.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+event.listen(
+    Book.__table__, "before_drop", DDL("DROP TABLE IF EXISTS books_fts").execute_if(dialect="sqlite")
+)
+
 class User(Base):
     __tablename__ = "users"
 
@@ -63,10 +130,49 @@ class Review(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     book_id = Column(Integer, ForeignKey("books.id", ondelete="CASCADE"))
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
     rating = Column(Integer, nullable=False)
     text = Column(Text, nullable=True)
     created_at = Column(DateTime, server_default=sa.func.now())
 
     book = relationship("Book", back_populates="reviews")
     user = relationship("User", back_populates="reviews")
+
+    __table_args__ = (
+        # Review lists filter by book and page by id (offset or keyset), so the
+        # index ends in id to hand rows back already in order.
+        Index("ix_reviews_book_id_id", book_id, id),
+    )
+
+
+class Job(Base):
+    # Work deferred past the response by app.jobs. A row is written before the
+    # job is queued and deleted once it succeeds, so the table only holds jobs
+    # that are pending, running or out of retries.
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    payload = Column(Text, nullable=False, default="{}")
+    status = Column(String, nullable=False, default="pending", server_default="pending")
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    last_error = Column(Text, nullable=True)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # The poller looks for due pending jobs and expired running ones.
+        Index("ix_jobs_status_run_after", status, run_after),
+    )
+
+
+class RevokedToken(Base):
+    # Logged-out access tokens by SHA-256, shared by every worker through
+    # app.revocations. A row is only useful until the token's own exp, after
+    # which it is deleted.
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True)
+    token_hash = Column(String(64), nullable=False, unique=True)
+    expires_at = Column(Float, nullable=False, index=True)  # unix time, as in the token's exp
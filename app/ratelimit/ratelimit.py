@@ -0,0 +1,165 @@
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+from app.utils.jwt_utils import InvalidToken, decode_access_token
+
+
+class Policy:
+    # "POST /users/login=10/60": a bucket of 10 requests refilled over 60 s.
+    # A path ending in "*" matches by prefix; method "*" matches any method.
+    def __init__(self, spec: str):
+        route, _, limit = spec.strip().partition("=")
+        self.method, _, self.path = route.strip().partition(" ")
+        capacity, _, period = limit.partition("/")
+        self.name = route.strip()
+        self.capacity = float(capacity)
+        self.rate = self.capacity / float(period)
+        self.prefix = self.path.endswith("*")
+        if self.prefix:
+            self.path = self.path[:-1]
+
+    def matches(self, method: str, path: str) -> bool:
+        if self.method not in ("*", method):
+            return False
+        return path.startswith(self.path) if self.prefix else path == self.path
+
+
+def parse_policies(spec: str) -> List[Policy]:
+    return [Policy(part) for part in spec.split(";") if part.strip()]
+
+
+class MemoryBucketBackend:
+    # Per-process buckets: a dict lookup and a little arithmetic per request.
+    # Once max_keys is reached, buckets that have refilled are dropped (nothing
+    # is forgiven early); if that is not enough, the least recently seen go,
+    # down to 90% so the sweep does not repeat on every request.
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}  # key -> (tokens, last seen, refill time)
+        self._lock = threading.Lock()
+
+    async def consume(self, key: str, capacity: float, rate: float, cost: float = 1.0) -> Tuple[bool, float]:
+        # A coroutine only to share the redis backend's interface; it never awaits.
+        now = time.monotonic()
+        with self._lock:
+            tokens, last, _ = self._buckets.get(key, (capacity, now, 0.0))
+            tokens = min(capacity, tokens + (now - last) * rate)
+            if tokens >= cost:
+                tokens, allowed, retry_after = tokens - cost, True, 0.0
+            else:
+                allowed, retry_after = False, (cost - tokens) / rate
+            self._buckets[key] = (tokens, now, capacity / rate)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+        return allowed, retry_after
+
+    def _prune(self, now: float) -> None:
+        buckets = {k: v for k, v in self._buckets.items() if now - v[1] < v[2]}
+        if len(buckets) > self.max_keys * 0.9:
+            keep = sorted(buckets.items(), key=lambda item: item[1][1])[-int(self.max_keys * 0.9):]
+            buckets = dict(keep)
+        self._buckets = buckets
+
+
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(retry_after)}
+"""
+
+
+class RedisBucketBackend:
+    # Shared buckets for several workers or hosts; the refill-and-take step
+    # runs as one Lua script, so concurrent requests cannot overspend. The
+    # client is a redis.asyncio one, so the round trip does not block the loop.
+    def __init__(self, client, prefix: str = "book_library:ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(TOKEN_BUCKET_LUA)
+
+    async def consume(self, key: str, capacity: float, rate: float, cost: float = 1.0) -> Tuple[bool, float]:
+        allowed, retry_after = await self._script(keys=[self.prefix + key], args=[capacity, rate, time.time(), cost])
+        return bool(int(allowed)), float(retry_after)
+
+
+def client_identity(scope) -> str:
+    # The user id from a valid bearer token (decoded through the token cache),
+    # otherwise the client address.
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                try:
+                    user_id = decode_access_token(token).get("id")
+                except InvalidToken:
+                    user_id = None
+                if user_id is not None:
+                    return f"user:{user_id}"
+            break
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RateLimitMiddleware:
+    # Plain ASGI rather than BaseHTTPMiddleware, so requests that no policy
+    # covers pay only for the policy scan.
+    def __init__(self, app, policies: List[Policy], backend):
+        self.app = app
+        self.policies = policies
+        self.backend = backend
+
+    def policy_for(self, method: str, path: str) -> Optional[Policy]:
+        for policy in self.policies:
+            if policy.matches(method, path):
+                return policy
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        policy = self.policy_for(scope["method"], scope["path"])
+        if policy is None:
+            return await self.app(scope, receive, send)
+
+        allowed, retry_after = await self.backend.consume(f"{policy.name}:{client_identity(scope)}",
+                                                          policy.capacity, policy.rate)
+        if allowed:
+            return await self.app(scope, receive, send)
+        response = JSONResponse(
+            status_code=429,
+            content={"detail": "Too many requests, retry later"},
+            headers={
+                "Retry-After": str(max(1, math.ceil(retry_after))),
+                "X-RateLimit-Limit": str(int(policy.capacity)),
+            },
+        )
+        await response(scope, receive, send)
+
+
+def create_backend():
+    if settings.rate_limit_backend == "redis":
+        import redis.asyncio  # optional dependency, only needed for the shared backend
+
+        return RedisBucketBackend(redis.asyncio.Redis.from_url(settings.rate_limit_url or settings.cache_url))
+    return MemoryBucketBackend(max_keys=settings.rate_limit_max_keys)
@@ -0,0 +1,76 @@
+import asyncio
+import time
+from typing import Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from app.config import settings
+from app.db.db import AsyncSessionLocal
+from app.models.models import RevokedToken
+from app.utils.jwt_utils import TokenCache, token_cache
+from app.utils.utils import logger
+
+
+class RevocationFeed:
+    # Shares logouts between worker processes through the revoked_tokens table.
+    # A logout is applied to this worker's token cache at once and written to
+    # the table; every worker polls the table into its own cache, so decoding a
+    # token stays an in-memory lookup. Other workers see a logout within
+    # poll_interval seconds. The table only holds tokens that have not expired,
+    # so each poll reads all of it: a row committed out of id order is not missed.
+    def __init__(self, session_factory, tokens: TokenCache, poll_interval: float = 1.0):
+        self.session_factory = session_factory
+        self.tokens = tokens
+        self.poll_interval = poll_interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def revoke(self, token: str) -> None:
+        # Raises InvalidToken for a token that is invalid or already revoked here.
+        claims = self.tokens.decode(token)
+        token_hash, expires = self.tokens.revoke(token, claims.get("exp"))
+        async with self.session_factory() as db:
+            await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= time.time()))
+            db.add(RevokedToken(token_hash=token_hash, expires_at=expires))
+            try:
+                await db.commit()
+            except IntegrityError:
+                # Revoked by another worker before its poll reached this one.
+                await db.rollback()
+
+    async def poll(self) -> int:
+        async with self.session_factory() as db:
+            rows = (await db.execute(
+                select(RevokedToken.token_hash, RevokedToken.expires_at).where(RevokedToken.expires_at > time.time())
+            )).all()
+        self.tokens.mark_revoked({token_hash: expires_at for token_hash, expires_at in rows})
+        return len(rows)
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.poll()
+            except SQLAlchemyError:
+                logger.exception("revocation poll failed")
+
+    async def start(self) -> None:
+        # The first poll runs before serving, so a restarted worker does not
+        # accept tokens that were logged out while it was down.
+        if self._task is not None:
+            return
+        try:
+            await self.poll()
+        except SQLAlchemyError:
+            logger.exception("revocation poll failed")
+        self._task = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+
+revocation_feed = RevocationFeed(AsyncSessionLocal, token_cache, poll_interval=settings.jwt_revocation_poll_interval)
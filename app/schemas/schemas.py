@@ -1,8 +1,17 @@
-from pydantic import BaseModel, EmailStr, constr, validator
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, conint, constr, validator
+from typing import Dict, Optional, List
 from datetime import date, datetime
 import re
 
+# Only content-addressed originals from the upload flow, never a file path.
+COVER_URL_RE = re.compile(r"^/covers/[0-9a-f]{64}\.[a-z]+$")
+
+
+def check_cover_url(v: Optional[str]) -> Optional[str]:
+    if v is not None and not COVER_URL_RE.match(v):
+        raise ValueError('cover_image must be a /covers/ URL returned by an upload')
+    return v
+
 
 class AuthorBase(BaseModel):
     name: str
@@ -22,6 +31,15 @@ class Author(AuthorBase):
         orm_mode = True
 
 
+class AuthorDetail(Author):
+    book_count: int = 0
+
+
+class AuthorPage(BaseModel):
+    items: List[AuthorDetail]
+    next_cursor: Optional[str] = None
+
+
 class BookBase(BaseModel):
     title: str
     genre: str
@@ -34,16 +52,37 @@ class BookCreate(BookBase):
     authors: List[AuthorCreate]  
     cover_image: Optional[str] = None
 
+    _cover_image = validator('cover_image', allow_reuse=True)(check_cover_url)
+
 
 class Book(BookBase):
     id: int
     authors: List[Author]  
     cover_image: Optional[str] = None
+    rating_count: int = 0
+    rating_average: Optional[float] = None
+    rating_histogram: Dict[str, int] = {}
 
     class Config:
         orm_mode = True
 
 
+class BookPage(BaseModel):
+    items: List[Book]
+    next_cursor: Optional[str] = None
+
+
+class BookImportError(BaseModel):
+    row: int
+    error: str
+
+
+class BookImportReport(BaseModel):
+    imported: int
+    failed: int
+    errors: List[BookImportError]
+
+
 class BookUpdate(BaseModel):
     title: Optional[str] = None
     genre: Optional[str] = None
@@ -53,6 +92,8 @@ class BookUpdate(BaseModel):
     cover_image: Optional[str] = None
     authors: Optional[List[AuthorCreate]] = None  
 
+    _cover_image = validator('cover_image', allow_reuse=True)(check_cover_url)
+
     class Config:
         orm_mode = True
 
@@ -121,6 +162,7 @@ class ReviewBase(BaseModel):
 
 
 class ReviewCreate(ReviewBase):
+    rating: conint(ge=1, le=5)
     book_id: int  
 
 
@@ -131,3 +173,21 @@ class ReviewOut(ReviewBase):
 
     class Config:
         orm_mode = True
+
+
+class ReviewPage(BaseModel):
+    items: List[ReviewOut]
+    next_cursor: Optional[str] = None
+
+
+class ReviewBulkResult(BaseModel):
+    row: int
+    status: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class ReviewBulkReport(BaseModel):
+    created: int
+    failed: int
+    results: List[ReviewBulkResult]
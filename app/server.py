@@ -0,0 +1,27 @@
+import multiprocessing
+
+import uvicorn
+
+from app.config import settings
+from app.db.replicas import check_worker_count
+
+
+def main() -> None:
+    # Multi-worker entry point without gunicorn: `python -m app.server`.
+    # gunicorn.conf.py is preferred in production; it adds preload, worker
+    # recycling and a graceful-shutdown timeout on top of the same settings.
+    host, _, port = settings.web_bind.rpartition(":")
+    workers = settings.web_workers or multiprocessing.cpu_count()
+    check_worker_count(workers)
+    uvicorn.run(
+        "app.main:app",
+        host=host or "0.0.0.0",
+        port=int(port),
+        workers=workers,
+        timeout_keep_alive=settings.web_keepalive,
+        access_log=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
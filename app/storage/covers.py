@@ -0,0 +1,180 @@
+import hashlib
+import os
+import re
+import tempfile
+import time
+from typing import List, Optional, Tuple
+
+from fastapi import UploadFile
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+import app.utils as utils
+from app.config import settings
+from app.models.models import Book
+
+COVER_URL_PREFIX = "/covers/"
+CHUNK_SIZE = 64 * 1024
+
+EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+}
+MEDIA_TYPES = {ext: media_type for media_type, ext in EXTENSIONS.items()}
+MEDIA_TYPES[".jpeg"] = "image/jpeg"
+
+# <sha256>.<ext> for originals, <sha256>_<width>.<ext> for thumbnails.
+COVER_NAME_RE = re.compile(r"^(?P<digest>[0-9a-f]{64})(?:_(?P<width>\d+))?(?P<ext>\.[a-z]+)$")
+
+
+class InvalidCover(ValueError):
+    pass
+
+
+def thumbnail_widths() -> List[int]:
+    return [int(width) for width in settings.cover_thumbnail_widths.split(",") if width.strip()]
+
+
+def cover_path(name: str) -> str:
+    return os.path.join(settings.cover_dir, name)
+
+
+def inside_cover_dir(path: str) -> bool:
+    root = os.path.realpath(settings.cover_dir)
+    return os.path.commonpath([root, os.path.realpath(path)]) == root
+
+
+def cover_name(cover_image: Optional[str]) -> Optional[str]:
+    # Books created before content addressing store a plain file path instead.
+    if cover_image and cover_image.startswith(COVER_URL_PREFIX):
+        return cover_image[len(COVER_URL_PREFIX):]
+    return None
+
+
+def cover_extension(upload: UploadFile) -> str:
+    ext = EXTENSIONS.get((upload.content_type or "").split(";")[0].strip().lower())
+    if ext is None:
+        ext = os.path.splitext(upload.filename or "")[1].lower()
+        if ext not in MEDIA_TYPES:
+            raise InvalidCover("Cover image must be a JPEG, PNG, GIF or WebP file")
+    return ".jpg" if ext == ".jpeg" else ext
+
+
+def _open_temp() -> Tuple[int, str]:
+    os.makedirs(settings.cover_dir, exist_ok=True)
+    return tempfile.mkstemp(dir=settings.cover_dir, suffix=".upload")
+
+
+def _commit_temp(temp_path: str, final_path: str) -> bool:
+    if os.path.exists(final_path):
+        # Same bytes already stored: keep the existing file, drop the upload.
+        # The touch tells a pending cleanup of the same cover to keep it.
+        try:
+            os.utime(final_path)
+            os.remove(temp_path)
+            return False
+        except FileNotFoundError:
+            pass  # removed by a cleanup just now; store the upload instead
+    os.replace(temp_path, final_path)
+    return True
+
+
+async def save_cover(upload: UploadFile) -> Tuple[str, bool]:
+    # Stores the upload under the SHA-256 of its bytes and returns the public URL
+    # and whether a new file was written. Chunks are written on the threadpool,
+    # so the event loop never blocks on disk and memory stays at one chunk.
+    ext = cover_extension(upload)
+    fd, temp_path = await run_in_threadpool(_open_temp)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            while chunk := await upload.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > settings.cover_max_bytes:
+                    raise InvalidCover("Cover image is too large")
+                digest.update(chunk)
+                await run_in_threadpool(buffer.write, chunk)
+        name = digest.hexdigest() + ext
+        created = await run_in_threadpool(_commit_temp, temp_path, cover_path(name))
+    except BaseException:
+        if os.path.exists(temp_path):
+            await run_in_threadpool(os.remove, temp_path)
+        raise
+    return COVER_URL_PREFIX + name, created
+
+
+def generate_thumbnails(name: str) -> None:
+    try:
+        from PIL import Image  # optional dependency, thumbnails are skipped without it
+    except ImportError:
+        return
+
+    match = COVER_NAME_RE.match(name)
+    if not match:
+        return
+    try:
+        with Image.open(cover_path(name)) as image:
+            for width in thumbnail_widths():
+                target = cover_path(f"{match['digest']}_{width}{match['ext']}")
+                if os.path.exists(target) or image.width <= width:
+                    continue
+                thumb = image.copy()
+                thumb.thumbnail((width, width * 10))
+                thumb.save(target)
+    except OSError as e:
+        utils.log_error(f"Thumbnail generation failed for {name}: {e}")
+
+
+def resolve_cover_file(name: str, width: Optional[int] = None) -> Optional[Tuple[str, str, bool]]:
+    # Returns (path, etag, final). A requested thumbnail that is not generated
+    # yet falls back to the original, which must not be cached as final.
+    match = COVER_NAME_RE.match(name)
+    if not match or match["width"]:
+        return None
+    if width:
+        thumb = f"{match['digest']}_{width}{match['ext']}"
+        if os.path.isfile(cover_path(thumb)):
+            return cover_path(thumb), f"{match['digest']}_{width}", True
+    if os.path.isfile(cover_path(name)):
+        return cover_path(name), match["digest"], not width
+    return None
+
+
+def recently_used(path: str, checked_at: float) -> bool:
+    try:
+        return os.path.getmtime(path) > checked_at - settings.cover_cleanup_grace_seconds
+    except FileNotFoundError:
+        return False
+
+
+async def remove_cover_if_unused(db: AsyncSession, cover_image: Optional[str], book_id: int) -> None:
+    if not cover_image:
+        return
+    name = cover_name(cover_image)
+    if name is None:
+        # Legacy paths come from the database, so only files under cover_dir go.
+        if inside_cover_dir(cover_image) and os.path.isfile(cover_image):
+            await run_in_threadpool(os.remove, cover_image)
+        return
+
+    # Identical uploads share one file, so only delete it with its last book.
+    # A new upload of the same bytes touches the file before its book commits,
+    # so a file touched within the grace period may be about to gain a
+    # reference the query below cannot see yet, and is kept.
+    checked_at = time.time()
+    others = await db.scalar(
+        select(func.count()).select_from(Book).where(Book.cover_image == cover_image, Book.id != book_id)
+    )
+    match = COVER_NAME_RE.match(name)
+    if others or not match or recently_used(cover_path(name), checked_at):
+        return
+    paths = [cover_path(name)] + [
+        cover_path(f"{match['digest']}_{width}{match['ext']}") for width in thumbnail_widths()
+    ]
+    for path in paths:
+        if os.path.isfile(path):
+            await run_in_threadpool(os.remove, path)
@@ -1 +1 @@
-from .utils import get_password_hash, verify_password, log_info, log_error
+from .utils import get_password_hash, verify_password, needs_rehash, log_info, log_error, logger
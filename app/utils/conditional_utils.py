@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+
+def http_date(value: Optional[datetime]) -> Optional[str]:
+    # Timestamps are stored as naive UTC.
+    if value is None:
+        return None
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def pack(etag: str, last_modified: Optional[str], payload: str) -> str:
+    # Validators travel with the cached payload so a 304 needs neither the
+    # database nor the serializer. JSON payloads never contain a raw newline.
+    return f"{etag}\n{last_modified or ''}\n{payload}"
+
+
+def unpack(value: str) -> Tuple[str, Optional[str], str]:
+    etag, last_modified, payload = value.split("\n", 2)
+    return etag, last_modified or None, payload
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    # Weak comparison, as If-None-Match requires.
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in header.split(","))
+
+
+def not_modified(request: Request, etag: str, last_modified: Optional[str]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def conditional_response(request: Request, value: str, cache_control: str = "private, no-cache") -> Response:
+    etag, last_modified, payload = unpack(value)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    if not_modified(request, etag, last_modified):
+        # The Vary the 200 would carry, so the compression middleware gives the
+        # 304 the same validator it gives the 200.
+        return Response(status_code=304, headers={**headers, "Vary": "Accept-Encoding"})
+    return Response(content=payload, media_type="application/json", headers=headers)
+
+
+def parse_if_match(header: Optional[str], prefix: str) -> Optional[int]:
+    # Returns the version named by an If-Match ETag built as '"<prefix><version>"',
+    # None for a missing header or "*", and raises ValueError for anything else.
+    # If-Match compares strongly (RFC 7232 3.1), so a weak tag never matches.
+    if header is None or header.strip() == "*":
+        return None
+    if header.strip().startswith("W/"):
+        raise ValueError("If-Match needs a strong ETag")
+    tag = header.strip().strip('"')
+    if not tag.startswith(prefix) or not tag[len(prefix):].isdigit():
+        raise ValueError("If-Match does not name a version of this resource")
+    return int(tag[len(prefix):])
@@ -1,10 +1,111 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from jose import jwt
+from typing import Dict, Optional, Tuple
+
+from jose import jwt, JWTError
 from app.config import settings
 
+try:
+    import jwt as pyjwt
+except ImportError:  # optional
+    pyjwt = None
+
+
+class InvalidToken(Exception):
+    pass
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.access_token_expire_minutes))
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
+
+
+def _decode_with_backend(token: str) -> dict:
+    try:
+        if settings.jwt_backend == "pyjwt" and pyjwt is not None:
+            return pyjwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        return jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    except JWTError as exc:
+        raise InvalidToken(str(exc)) from exc
+    except Exception as exc:
+        if pyjwt is not None and isinstance(exc, pyjwt.PyJWTError):
+            raise InvalidToken(str(exc)) from exc
+        raise
+
+
+def token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class TokenCache:
+    # Validated claims keyed by token hash, kept until the token's exp so a
+    # cached entry can never outlive the signature check it replaced.
+    # Revoked hashes are remembered only until their own exp as well. The
+    # list is in memory; app.revocations fills it with other workers' logouts.
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._claims: "OrderedDict[str, dict]" = OrderedDict()
+        self._revoked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def decode(self, token: str) -> dict:
+        key = token_key(token)
+        now = time.time()
+        with self._lock:
+            if key in self._revoked:
+                raise InvalidToken("Token has been revoked")
+            claims = self._claims.get(key)
+            if claims is not None:
+                if claims["exp"] > now:
+                    self._claims.move_to_end(key)
+                    self.hits += 1
+                    return claims
+                del self._claims[key]
+            self.misses += 1
+        claims = _decode_with_backend(token)
+        if self.max_entries > 0 and isinstance(claims.get("exp"), (int, float)):
+            with self._lock:
+                self._claims[key] = claims
+                self._claims.move_to_end(key)
+                while len(self._claims) > self.max_entries:
+                    self._claims.popitem(last=False)
+        return claims
+
+    def revoke(self, token: str, exp: Optional[float] = None) -> Tuple[str, float]:
+        # Returns the token hash and the time until which it stays revoked.
+        key = token_key(token)
+        expires = exp if exp is not None else time.time() + settings.access_token_expire_minutes * 60
+        self.mark_revoked({key: expires})
+        return key, expires
+
+    def mark_revoked(self, revoked: Dict[str, float]) -> None:
+        now = time.time()
+        with self._lock:
+            for key in revoked:
+                self._claims.pop(key, None)
+            self._revoked.update(revoked)
+            # Expired tokens fail the exp check anyway, so drop them from the list.
+            self._revoked = {k: v for k, v in self._revoked.items() if v > now}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._claims.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        return {"entries": len(self._claims), "revoked": len(self._revoked), "hits": self.hits, "misses": self.misses}
+
+
+token_cache = TokenCache(settings.jwt_cache_size)
+
+
+def decode_access_token(token: str) -> dict:
+    return token_cache.decode(token)
@@ -0,0 +1,95 @@
+import json
+import logging
+import os
+import queue
+import random
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app.config import settings
+from app.utils.utils import LOG_RECORD_ATTRS
+
+LOGGER_NAME = "book_library"
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+_listener: Optional[QueueListener] = None
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in LOG_RECORD_ATTRS and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def new_request_id(incoming: Optional[str] = None) -> str:
+    return incoming or uuid.uuid4().hex
+
+
+def should_log_request(method: str, path: str, status_code: int, duration_ms: float) -> bool:
+    # Errors, slow requests and writes are always kept; routine reads on the
+    # busiest paths are sampled so they do not dominate the log volume.
+    if status_code >= 400 or duration_ms >= settings.log_slow_request_ms:
+        return True
+    if method not in ("GET", "HEAD"):
+        return True
+    sampled = [prefix for prefix in settings.log_sampled_paths.split(",") if prefix]
+    if any(path.startswith(prefix) for prefix in sampled):
+        return random.random() < settings.log_sample_rate
+    return True
+
+
+def setup_logging() -> None:
+    # Request handlers only put records on an in-memory queue; formatting and
+    # file/console I/O happen on the QueueListener's background thread.
+    global _listener
+    if _listener is not None:
+        return
+
+    handlers = []
+    if settings.log_file:
+        os.makedirs(os.path.dirname(settings.log_file) or ".", exist_ok=True)
+        handlers.append(logging.FileHandler(settings.log_file))
+    if settings.log_to_stdout:
+        handlers.append(logging.StreamHandler())
+    formatter = JsonFormatter()
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(settings.log_level.upper())
+    logger.handlers = [queue_handler]
+    logger.propagate = False
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,28 +1,34 @@
 import logging
-import os
 import bcrypt
-from datetime import datetime, timedelta
 
-LOG_DIR = "../../logs"
-os.makedirs(LOG_DIR, exist_ok=True)
+# Handlers are attached by app.utils.logging_utils.setup_logging at startup.
+logger = logging.getLogger("book_library")
 
-logging.basicConfig(
-    filename=os.path.join(LOG_DIR, "api.log"),
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+# Attributes every LogRecord has; anything else was passed through `extra=`.
+LOG_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
 
-def log_info(message: str):
-    print(message) 
-    logging.info(message)  
 
-def log_error(message: str):
-    print(message)  
-    logging.error(message)  
+def log_fields(fields: dict) -> dict:
+    # makeRecord raises KeyError for an extra key that shadows a LogRecord
+    # attribute (filename, module, name, ...), so such keys get a prefix.
+    return {f"field_{key}" if key in LOG_RECORD_ATTRS else key: value for key, value in fields.items()}
 
+def log_info(message: str, **fields):
+    logger.info(message, extra=log_fields(fields))
 
-def get_password_hash(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+def log_error(message: str, **fields):
+    logger.error(message, extra=log_fields(fields))
+
+
+def get_password_hash(password: str, rounds: int = 12) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+def needs_rehash(hashed_password: str, rounds: int) -> bool:
+    # bcrypt hashes look like $2b$12$<salt+digest>; the second field is the cost.
+    try:
+        return int(hashed_password.split('$')[2]) != rounds
+    except (IndexError, ValueError):
+        return True
@@ -0,0 +1,232 @@
+"""Load test for the main API paths, driven in-process through the ASGI app.
+
+Seeds a database with a synthetic catalogue, then runs each scenario at a fixed
+concurrency and reports throughput, latency percentiles and SQL statements per
+request. Run from the repo root:
+
+    python benchmarks/bench_api.py --books 5000 --reviews 20000 --concurrency 16
+    python benchmarks/bench_api.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_api.py --baseline benchmarks/baseline.json
+
+The database defaults to a fresh SQLite file; pass --database-url to point at
+Postgres (its tables are dropped and re-created). With --baseline, a scenario
+whose throughput drops or p95 grows by more than --tolerance fails the run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+SCENARIOS = ["list_books", "get_book", "search", "create_review", "login"]
+GENRES = ["Fantasy", "Horror", "Science Fiction", "Romance", "History", "Poetry", "Mystery", "Biography"]
+WORDS = ["shadow", "river", "empire", "garden", "storm", "silent", "winter", "golden", "machine", "ocean",
+         "crown", "forest", "letter", "night", "glass", "fire", "stone", "journey", "city", "dream"]
+PASSWORD = "Bench#Passw0rd"
+
+
+def configure_environment(args) -> None:
+    # Settings are read at import time, so this must run before importing app.*.
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ["CACHE_ENABLED"] = "false" if args.no_cache else "true"
+    os.environ["RATE_LIMIT_ENABLED"] = "false"  # every simulated client shares one address
+    os.environ["PASSWORD_HASH_ROUNDS"] = str(args.bcrypt_rounds)
+    os.environ.setdefault("LOG_FILE", "")
+
+
+def seed(args) -> None:
+    from sqlalchemy import insert
+
+    from app.crud.search import search_document_for
+    from app.db.db import Base, engine
+    from app.models.models import Author, Book, Review, User, book_author_table
+    from app.utils.utils import get_password_hash
+
+    rng = random.Random(args.seed)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    authors = [{"id": i, "name": f"Author {i} {rng.choice(WORDS).title()}"} for i in range(1, args.authors + 1)]
+    books, links = [], []
+    for book_id in range(1, args.books + 1):
+        title = " ".join(rng.choice(WORDS) for _ in range(3)).title()
+        genre = rng.choice(GENRES)
+        description = " ".join(rng.choice(WORDS) for _ in range(40))
+        book_authors = rng.sample(authors, k=min(len(authors), rng.randint(1, 3)))
+        links += [{"book_id": book_id, "author_id": author["id"]} for author in book_authors]
+        books.append({
+            "id": book_id, "title": title, "genre": genre, "page_count": rng.randint(80, 900),
+            "publication_year": rng.randint(1900, 2025), "description": description,
+            "search_document": search_document_for(title, genre, description, [a["name"] for a in book_authors]),
+        })
+
+    users = [{"id": i, "email": f"user{i}@bench.test", "full_name": f"User {i}", "role": "Member",
+              "is_active": True, "hashed_password": get_password_hash(PASSWORD, args.bcrypt_rounds)}
+             for i in range(1, args.users + 1)]
+    reviews = []
+    for review_id in range(1, args.reviews + 1):
+        book = books[rng.randrange(len(books))]
+        rating = rng.randint(1, 5)
+        reviews.append({"id": review_id, "book_id": book["id"], "user_id": rng.randint(1, args.users),
+                        "rating": rating, "text": "seeded review"})
+        book["rating_count"] = book.get("rating_count", 0) + 1
+        book["rating_sum"] = book.get("rating_sum", 0) + rating
+        book[f"rating_count_{rating}"] = book.get(f"rating_count_{rating}", 0) + 1
+    for book in books:
+        for column in ["rating_count", "rating_sum"] + [f"rating_count_{star}" for star in range(1, 6)]:
+            book.setdefault(column, 0)
+        book["rating_average"] = book["rating_sum"] / book["rating_count"] if book["rating_count"] else None
+
+    with engine.begin() as conn:
+        for table, rows in ((Author.__table__, authors), (Book.__table__, books),
+                            (book_author_table, links), (User.__table__, users), (Review.__table__, reviews)):
+            for start in range(0, len(rows), 5000):
+                conn.execute(insert(table), rows[start:start + 5000])
+
+
+def percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_scenario(client, name: str, args, token: str) -> dict:
+    from app.metrics.metrics import metrics
+
+    rng = random.Random(f"{args.seed}-{name}")
+    headers = {"Authorization": f"Bearer {token}"}
+    requests_left = args.requests if name != "login" else args.login_requests
+    latencies, errors = [], 0
+
+    def make_request():
+        if name == "list_books":
+            return client.get("/books/", params={"skip": rng.randrange(max(1, args.books - 20)), "limit": 20},
+                              headers=headers)
+        if name == "get_book":
+            return client.get(f"/books/{rng.randint(1, args.books)}", headers=headers)
+        if name == "search":
+            return client.get("/books/", params={"search": rng.choice(WORDS)[:4], "limit": 20}, headers=headers)
+        if name == "create_review":
+            return client.post("/reviews/", json={"book_id": rng.randint(1, args.books), "rating": rng.randint(1, 5),
+                                                  "text": "benchmark"}, headers=headers)
+        return client.post("/users/login", data={"username": f"user{rng.randint(1, args.users)}@bench.test",
+                                                 "password": PASSWORD})
+
+    async def worker():
+        nonlocal requests_left, errors
+        while requests_left > 0:
+            requests_left -= 1
+            start = time.perf_counter()
+            response = await make_request()
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    queries_before = metrics.db_queries
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+        "queries_per_request": round((metrics.db_queries - queries_before) / max(1, len(latencies)), 2),
+    }
+
+
+async def run(args) -> dict:
+    import httpx
+
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post("/users/login", data={"username": "user1@bench.test", "password": PASSWORD})
+        response.raise_for_status()
+        token = response.json()["access_token"]
+        results = {}
+        for name in args.scenarios:
+            results[name] = await run_scenario(client, name, args, token)
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} rps")
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']} -> {current['p95_ms']} ms")
+        if current["queries_per_request"] > previous["queries_per_request"]:
+            regressions.append(
+                f"{name}: queries/request {previous['queries_per_request']} -> {current['queries_per_request']}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite:///./bench.db")
+    parser.add_argument("--books", type=int, default=2000)
+    parser.add_argument("--authors", type=int, default=500)
+    parser.add_argument("--reviews", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--login-requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--bcrypt-rounds", type=int, default=10)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--no-cache", action="store_true", help="measure the database path, not the response cache")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument("--save-baseline")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    configure_environment(args)
+    if not args.skip_seed:
+        seed(args)
+    results = asyncio.run(run(args))
+
+    print(f"{'scenario':<15}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}{'errors':>8}")
+    for name, r in results.items():
+        print(f"{name:<15}{r['throughput_rps']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}"
+              f"{r['queries_per_request']:>9}{r['errors']:>8}")
+
+    report = {
+        "config": {key: value for key, value in vars(args).items()
+                   if key not in ("save_baseline", "baseline", "skip_seed")},
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "results": results,
+    }
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
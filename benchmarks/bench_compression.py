@@ -0,0 +1,82 @@
+"""Response compression: bytes on the wire and CPU cost per encoding.
+
+Run from the repo root:
+
+    python benchmarks/bench_compression.py --requests 200
+
+Seeds a catalogue with bench_api's seeder and fetches the same pages with each
+Accept-Encoding the server can produce. Every encoding is measured twice: with
+the compressed-body cache cleared before each request (every hit compresses)
+and with it warm (repeat hits reuse the compressed bytes). The response cache
+stays on, so the database is out of the picture.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from bench_api import configure_environment, seed
+
+PAGES = {
+    "books x20": "/books/?limit=20",
+    "books x100": "/books/?limit=100",
+    "books x500": "/books/?limit=500",
+    "reviews": "/reviews/book/1",
+}
+
+
+async def run(args) -> None:
+    import httpx
+
+    from app.compression.compression import compressor
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post("/users/login", data={"username": "user1@bench.test", "password": "Bench#Passw0rd"})
+        auth = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        print(f"{'page':>11} {'encoding':>8} {'cache':>5} {'wire bytes':>11} {'ratio':>6} "
+              f"{'compress ms':>11} {'p50 ms':>7}")
+        for label, path in PAGES.items():
+            identity_bytes = None
+            for encoding in ["identity"] + compressor.encodings:
+                for warm in (False, True) if encoding != "identity" else (False,):
+                    headers = {**auth, "Accept-Encoding": encoding}
+                    (await client.get(path, headers=headers)).raise_for_status()  # fills the response cache
+                    seconds_before, responses_before = compressor.seconds, compressor.responses
+                    latencies, wire = [], 0
+                    for _ in range(args.requests):
+                        if not warm and compressor.cache is not None:
+                            compressor.cache.clear()
+                        start = time.perf_counter()
+                        response = await client.get(path, headers=headers)
+                        latencies.append(time.perf_counter() - start)
+                        # httpx decodes the body; Content-Length is what was sent.
+                        wire += int(response.headers["content-length"])
+                    wire //= args.requests
+                    identity_bytes = identity_bytes or wire
+                    compressed = compressor.responses - responses_before
+                    cpu_ms = (compressor.seconds - seconds_before) * 1000 / compressed if compressed else 0.0
+                    print(f"{label:>11} {encoding:>8} {('warm' if warm else 'cold') if encoding != 'identity' else '-':>5} "
+                          f"{wire:>11} {wire / identity_bytes:6.3f} {cpu_ms:11.3f} "
+                          f"{statistics.median(latencies) * 1000:7.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", default="sqlite:///./bench.db")
+    parser.add_argument("--books", type=int, default=1000)
+    parser.add_argument("--reviews", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=200, help="requests per page and encoding")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    # Only what the seeder needs; bench_api.py has the full set of knobs.
+    args.authors, args.users, args.bcrypt_rounds, args.no_cache = 200, 1, 4, False
+    configure_environment(args)
+    seed(args)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
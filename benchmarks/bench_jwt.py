@@ -0,0 +1,77 @@
+"""Authenticated requests/s with and without the decoded-token cache.
+
+Run from the repo root:
+
+    python benchmarks/bench_jwt.py --requests 5000 --concurrency 16 --tokens 50
+
+Drives a minimal route that depends only on get_current_user through the ASGI
+app, so the numbers isolate the auth cost from database and serialization work.
+Pass --backend pyjwt to compare against PyJWT when it is installed.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("SECRET_KEY", "bench")
+
+import httpx  # noqa: E402
+from fastapi import Depends, FastAPI  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.dependencies.dependencies import get_current_user  # noqa: E402
+from app.utils import jwt_utils  # noqa: E402
+
+app = FastAPI()
+
+
+@app.get("/me")
+async def me(user=Depends(get_current_user)):
+    return {"id": user.id}
+
+
+async def run(tokens: list, requests: int, concurrency: int) -> dict:
+    remaining = requests
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                token = tokens[remaining % len(tokens)]
+                response = await client.get("/me", headers={"Authorization": f"Bearer {token}"})
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return {"seconds": elapsed, "requests_per_s": requests / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--tokens", type=int, default=50, help="distinct users sending requests")
+    parser.add_argument("--backend", choices=["jose", "pyjwt"], default=settings.jwt_backend)
+    args = parser.parse_args()
+
+    settings.jwt_backend = args.backend
+    tokens = [jwt_utils.create_access_token({"sub": f"user{i}@bench.test", "role": "Member", "id": i})
+              for i in range(args.tokens)]
+
+    results = {}
+    for label, size in (("no cache", 0), ("cache", settings.jwt_cache_size or 10000)):
+        jwt_utils.token_cache.max_entries = size
+        jwt_utils.token_cache.clear()
+        results[label] = asyncio.run(run(tokens, args.requests, args.concurrency))
+        print(f"{label:>9}: {results[label]['requests_per_s']:8.0f} req/s  {jwt_utils.token_cache.stats()}")
+    print(f"speedup: {results['cache']['requests_per_s'] / results['no cache']['requests_per_s']:.2f}x "
+          f"(backend={args.backend}{'' if args.backend != 'pyjwt' or jwt_utils.pyjwt else ', not installed: jose used'})")
+
+
+if __name__ == "__main__":
+    main()
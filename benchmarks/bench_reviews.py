@@ -0,0 +1,74 @@
+"""Review ingestion throughput: one POST /reviews/ per review vs POST /reviews/bulk.
+
+Run from the repo root:
+
+    python benchmarks/bench_reviews.py --reviews 2000 --batch 500 --concurrency 8
+
+Seeds a catalogue with bench_api's seeder, then submits the same number of
+reviews both ways through the ASGI app and reports reviews/s and SQL
+statements per review.
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from bench_api import configure_environment, seed
+
+
+async def run(args) -> None:
+    import httpx
+
+    from app.main import app
+    from app.metrics.metrics import metrics
+
+    rng = random.Random(args.seed)
+    reviews = [{"book_id": rng.randint(1, args.books), "rating": rng.randint(1, 5), "text": "benchmark"}
+               for _ in range(args.reviews)]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post("/users/login", data={"username": "user1@bench.test", "password": "Bench#Passw0rd"})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        async def single():
+            queue = list(reviews)
+
+            async def worker():
+                while queue:
+                    (await client.post("/reviews/", json=queue.pop(), headers=headers)).raise_for_status()
+
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+
+        async def batched():
+            for start in range(0, len(reviews), args.batch):
+                response = await client.post("/reviews/bulk", json=reviews[start:start + args.batch], headers=headers)
+                response.raise_for_status()
+                assert response.json()["failed"] == 0
+
+        for label, submit in (("single", single), (f"bulk x{args.batch}", batched)):
+            queries_before = metrics.db_queries
+            start = time.perf_counter()
+            await submit()
+            elapsed = time.perf_counter() - start
+            print(f"{label:>12}: {args.reviews / elapsed:9.0f} reviews/s  "
+                  f"{(metrics.db_queries - queries_before) / args.reviews:6.2f} queries/review")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", default="sqlite:///./bench.db")
+    parser.add_argument("--books", type=int, default=1000)
+    parser.add_argument("--reviews", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    # Only what the seeder needs; bench_api.py has the full set of knobs.
+    args.authors, args.users, args.bcrypt_rounds, args.no_cache = 200, 1, 4, False
+    configure_environment(args)
+    seed(argparse.Namespace(**{**vars(args), "reviews": 0}))
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
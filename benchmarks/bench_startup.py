@@ -0,0 +1,57 @@
+"""Worker cold-start time: importing app.main plus running its lifespan startup.
+
+Run from the repo root against a migrated database:
+
+    python benchmarks/bench_startup.py --runs 5 --target-ms 1500
+
+Each run is a fresh interpreter, as a newly forked or restarted worker would
+be (minus what preload shares). Exits 1 if the median exceeds --target-ms.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+CHILD = """
+import asyncio, json, sys, time
+sys.path.insert(0, %r)
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def startup():
+    async with app.router.lifespan_context(app):
+        return time.perf_counter()
+
+ready = asyncio.run(startup())
+print(json.dumps({"import_ms": (imported - start) * 1000, "startup_ms": (ready - imported) * 1000}))
+""" % ROOT
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=1500.0, help="median import + startup budget")
+    args = parser.parse_args()
+
+    samples = []
+    for _ in range(args.runs):
+        out = subprocess.run([sys.executable, "-c", CHILD], capture_output=True, text=True)
+        if out.returncode:
+            sys.exit(out.stderr)
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    for key in ("import_ms", "startup_ms"):
+        values = [s[key] for s in samples]
+        print(f"{key:>10}: median {statistics.median(values):7.1f}  max {max(values):7.1f}")
+    total = statistics.median(s["import_ms"] + s["startup_ms"] for s in samples)
+    print(f"{'total':>10}: median {total:7.1f}  target {args.target_ms:.0f}")
+    sys.exit(1 if total > args.target_ms else 0)
+
+
+if __name__ == "__main__":
+    main()
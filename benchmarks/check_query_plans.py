@@ -0,0 +1,122 @@
+"""Check that the hot read queries are served by an index, using EXPLAIN.
+
+Run from the repo root against an empty scratch database (tables are created
+and a little data is seeded):
+
+    python benchmarks/check_query_plans.py
+    python benchmarks/check_query_plans.py --database-url postgresql://.../scratch
+
+The statements are built with the same crud helpers the API uses. On Postgres
+sequential scans are disabled for the session so tiny tables still show which
+index *can* serve the query. Exits 1 if any query falls back to a full scan.
+tests/test_query_plans.py runs the same checks on SQLite with the test suite.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from typing import List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def hot_queries():
+    from sqlalchemy import func, select
+
+    from app.crud.crud import book_select, filter_books, paginate
+    from app.crud.projection import BookProjection
+    from app.crud.search import apply_search
+    from app.models.models import Author, Book, Review
+
+    projection = BookProjection()
+    # name -> (statement builder taking the dialect name, index expected on sqlite, on postgres)
+    return {
+        "book by id": (lambda d: book_select().where(Book.id == 7), "PRIMARY KEY", "books_pkey"),
+        "book keyset page": (lambda d: paginate(projection.select(), Book.id, 0, 20, after_id=10),
+                             "PRIMARY KEY", "books_pkey"),
+        "books by genre": (lambda d: paginate(filter_books(projection.select(), genre="Fantasy"), Book.id, 0, 20),
+                           "ix_books_genre_lower", "ix_books_genre_lower"),
+        "books by author": (lambda d: paginate(filter_books(projection.select(), author_id=3), Book.id, 0, 20),
+                            "ix_book_author_author_id", "ix_book_author_author_id"),
+        "author by name": (lambda d: select(Author).where(func.lower(Author.name) == "author 3"),
+                           "ux_authors_name_lower", "ux_authors_name_lower"),
+        "reviews of a book": (lambda d: select(Review).where(Review.book_id == 3).order_by(Review.id).limit(50),
+                              "ix_reviews_book_id_id", "ix_reviews_book_id_id"),
+        "reviews by user": (lambda d: select(Review).where(Review.user_id == 2), "ix_reviews_user_id",
+                            "ix_reviews_user_id"),
+        "search": (lambda d: paginate(apply_search(projection.select(), d, "shadow", ranked=False), Book.id, 0, 20),
+                   "books_fts", "ix_books_search_document_fts"),
+        "books by rating": (lambda d: select(Book.id).order_by(Book.rating_average.desc()).limit(20),
+                            "ix_books_rating_average", "ix_books_rating_average"),
+    }
+
+
+def explain(conn, dialect: str, stmt) -> str:
+    from sqlalchemy import text
+
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    if dialect == "sqlite":
+        return "\n".join(row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+    return "\n".join(row[0] for row in conn.execute(text(f"EXPLAIN {sql}")))
+
+
+def seed(conn) -> None:
+    from sqlalchemy import insert
+
+    from app.models.models import Author, Book, Review, User, book_author_table
+
+    conn.execute(insert(Author), [{"name": f"Author {i}"} for i in range(50)])
+    conn.execute(insert(Book), [
+        {"title": f"Book {i}", "genre": ["Fantasy", "Horror"][i % 2], "page_count": 100, "publication_year": 2000,
+         "description": "shadow river", "search_document": f"book {i} shadow river"}
+        for i in range(200)
+    ])
+    conn.execute(insert(book_author_table), [{"book_id": i + 1, "author_id": i % 50 + 1} for i in range(200)])
+    conn.execute(insert(User), [{"email": f"u{i}@x.test", "hashed_password": "x"} for i in range(5)])
+    conn.execute(insert(Review), [{"book_id": i % 200 + 1, "user_id": i % 5 + 1, "rating": 3} for i in range(500)])
+
+
+def check_plans(engine, verbose: bool = False) -> List[str]:
+    # Recreates the tables on engine, seeds them and returns the names of the
+    # hot queries whose plan does not use the expected index.
+    from sqlalchemy import text
+
+    from app.db.db import Base
+    import app.models.models  # noqa: F401  registers the tables on Base
+
+    dialect = engine.dialect.name
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    failures = []
+    with engine.begin() as conn:
+        seed(conn)
+        conn.execute(text("ANALYZE"))
+        if dialect == "postgresql":
+            conn.execute(text("SET LOCAL enable_seqscan = off"))
+        for name, (build, sqlite_index, pg_index) in hot_queries().items():
+            plan = explain(conn, dialect, build(dialect))
+            expected = sqlite_index if dialect == "sqlite" else pg_index
+            ok = expected in plan
+            if not ok:
+                failures.append(name)
+            print(f"{'ok  ' if ok else 'FAIL'} {name:<20} expects {expected}")
+            if verbose or not ok:
+                print("     " + plan.replace("\n", "\n     "))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=f"sqlite:///{tempfile.mkdtemp()}/plans.db")
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("SECRET_KEY", "plans")
+    from app.db.db import engine
+
+    sys.exit(1 if check_plans(engine, args.verbose) else 0)
+
+
+if __name__ == "__main__":
+    main()
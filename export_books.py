@@ -0,0 +1,35 @@
+import argparse
+import asyncio
+import sys
+
+from app.crud.export import gzip_stream, iter_export
+from app.db.db import AsyncSessionLocal
+
+
+async def main(args):
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        async with AsyncSessionLocal() as db:
+            chunks = iter_export(
+                db, args.format, genre=args.genre, author=args.author, include_reviews=args.include_reviews
+            )
+            if args.gzip:
+                async for data in gzip_stream(chunks):
+                    out.write(data)
+            else:
+                async for chunk in chunks:
+                    out.write(chunk.encode("utf-8"))
+    finally:
+        if args.output:
+            out.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream the book catalogue as NDJSON or CSV.")
+    parser.add_argument("-o", "--output", help="file to write, defaults to stdout")
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--genre")
+    parser.add_argument("--author")
+    parser.add_argument("--include-reviews", action="store_true")
+    parser.add_argument("--gzip", action="store_true")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,35 @@
+# Production server: gunicorn managing uvicorn workers.
+#
+#     alembic upgrade head
+#     gunicorn -c gunicorn.conf.py app.main:app
+#
+# Everything is configured through the WEB_* settings in app/config.py.
+import multiprocessing
+
+from app.config import settings
+from app.db.replicas import check_worker_count
+
+bind = settings.web_bind
+workers = settings.web_workers or multiprocessing.cpu_count()
+check_worker_count(workers)
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app once in the master so workers fork ready to serve. The
+# lifespan hook then warms each worker's own pool after the fork.
+preload_app = settings.web_preload
+timeout = settings.web_timeout
+graceful_timeout = settings.web_graceful_timeout
+keepalive = settings.web_keepalive
+max_requests = settings.web_max_requests
+max_requests_jitter = settings.web_max_requests // 10
+
+# Access logs come from the app's own request logging.
+accesslog = None
+
+
+def post_fork(server, worker):
+    # Connections opened in the master must not be shared with the children.
+    from app.db.db import async_engine, engine
+
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
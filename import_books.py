@@ -0,0 +1,24 @@
+import argparse
+import asyncio
+import json
+
+from app.crud.bulk import import_books, iter_import_rows
+from app.db.db import AsyncSessionLocal
+from app.config import settings
+
+
+async def main(path: str, fmt: str, chunk_size: int):
+    with open(path, "rb") as fileobj:
+        async with AsyncSessionLocal() as db:
+            report = await import_books(db, iter_import_rows(fileobj, fmt), chunk_size)
+    print(json.dumps(report.as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import books from an NDJSON or CSV file.")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["ndjson", "csv"], help="defaults from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=settings.import_chunk_size)
+    args = parser.parse_args()
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    asyncio.run(main(args.path, fmt, args.chunk_size))
@@ -0,0 +1,100 @@
+import os
+import sys
+import tempfile
+
+# Settings are read when app.* is first imported, so the environment is set
+# up before any test module imports the app.
+DATA_DIR = tempfile.mkdtemp(prefix="book_library_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{DATA_DIR}/primary.db"
+os.environ["SECRET_KEY"] = "tests"
+os.environ["DATABASE_REPLICA_URLS"] = ""
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["JOB_WORKERS"] = "0"
+os.environ["PASSWORD_HASH_ROUNDS"] = "4"
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+os.environ["WARMUP_CONNECTIONS"] = "1"
+os.environ["COVER_DIR"] = os.path.join(DATA_DIR, "covers")
+os.environ["LOG_FILE"] = ""
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest  # noqa: E402
+from sqlalchemy import event, insert  # noqa: E402
+
+BOOKS = 60
+AUTHORS = 12
+PASSWORD = "Tests#Passw0rd"
+
+
+def seed_catalogue() -> None:
+    from app.models.models import Author, Book, book_author_table
+
+    from app.db.db import engine
+
+    genres = ["Fantasy", "Horror", "Poetry"]
+    with engine.begin() as conn:
+        conn.execute(insert(Author), [{"id": i, "name": f"Author {i}"} for i in range(1, AUTHORS + 1)])
+        conn.execute(insert(Book), [
+            {"id": i, "title": f"Shadow Book {i}", "genre": genres[i % 3], "page_count": 100,
+             "publication_year": 2000, "description": "d", "search_document": f"shadow book {i}"}
+            for i in range(1, BOOKS + 1)
+        ])
+        # Two authors per book, so per-row author loads would show up in the counts.
+        conn.execute(insert(book_author_table), [
+            {"book_id": i, "author_id": author_id}
+            for i in range(1, BOOKS + 1)
+            for author_id in {i % AUTHORS + 1, (i + 5) % AUTHORS + 1}
+        ])
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    import app.models.models  # noqa: F401  registers the tables on Base
+    from app.db.db import Base, engine
+    from app.main import app
+
+    Base.metadata.create_all(bind=engine)
+    seed_catalogue()
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def login(client, email: str, role: str = "Member") -> dict:
+    client.post("/users/register", json={"email": email, "password": PASSWORD, "role": role})
+    response = client.post("/users/login", data={"username": email, "password": PASSWORD})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    return login(client, "admin@tests.example", role="admin")
+
+
+@pytest.fixture(scope="session")
+def member_headers(client):
+    return login(client, "member@tests.example")
+
+
+@pytest.fixture
+def statements():
+    # Statements sent on the primary async engine, by a before_cursor_execute listener.
+    from app.db.db import async_engine
+
+    executed = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    yield executed
+    event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+
+
+@pytest.fixture
+def no_response_cache(monkeypatch):
+    from app.cache.cache import response_cache
+
+    monkeypatch.setattr(response_cache, "enabled", False)
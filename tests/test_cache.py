@@ -0,0 +1,62 @@
+import asyncio
+import fnmatch
+
+from app.cache.cache import MemoryCacheBackend, RedisCacheBackend, ResponseCache
+
+
+class FakeAsyncRedis:
+    # The redis.asyncio calls RedisCacheBackend makes, over a dict.
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        value = self.data.get(key)
+        return value.encode() if value is not None else None
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, "0")) + 1)
+        return int(self.data[key])
+
+    async def scan_iter(self, match):
+        for key in list(self.data):
+            if fnmatch.fnmatch(key, match):
+                yield key
+
+
+async def exercise(cache: ResponseCache) -> list:
+    builds = []
+
+    async def build():
+        builds.append(1)
+        return f"payload {len(builds)}"
+
+    key = await cache.book_list_key("limit=10")
+    first = await cache.get_or_set(key, build)
+    second = await cache.get_or_set(key, build)
+    await cache.invalidate_book(3)
+    third = await cache.get_or_set(await cache.book_list_key("limit=10"), build)
+    return [first, second, third]
+
+
+def test_redis_and_memory_backends_behave_alike():
+    redis_cache = ResponseCache(RedisCacheBackend(FakeAsyncRedis()))
+    memory_cache = ResponseCache(MemoryCacheBackend())
+    expected = ["payload 1", "payload 1", "payload 2"]
+    assert asyncio.run(exercise(redis_cache)) == expected
+    assert asyncio.run(exercise(memory_cache)) == expected
+    assert (redis_cache.hits, redis_cache.misses) == (1, 2)
+
+
+def test_redis_clear_only_drops_its_prefix():
+    client = FakeAsyncRedis()
+    client.data["other:key"] = "kept"
+    backend = RedisCacheBackend(client)
+    asyncio.run(backend.set("book:1", "x"))
+    asyncio.run(backend.clear())
+    assert client.data == {"other:key": "kept"}
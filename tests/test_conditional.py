@@ -0,0 +1,44 @@
+import pytest
+
+
+@pytest.fixture
+def compress_everything(monkeypatch):
+    from app.compression.compression import compressor
+
+    monkeypatch.setattr(compressor, "min_size", 0)
+
+
+@pytest.mark.parametrize("path", ["/books/5", "/reviews/book/5"])
+@pytest.mark.parametrize("encoding, weak", [("gzip", True), ("identity", False)])
+def test_validators_match_across_200_and_304(client, member_headers, compress_everything, path, encoding, weak):
+    headers = {**member_headers, "Accept-Encoding": encoding}
+    full = client.get(path, headers=headers)
+    assert full.headers["etag"].startswith('W/"') == weak
+
+    # If-None-Match compares weakly, so either form of the tag gives a 304.
+    for tag in (full.headers["etag"], full.headers["etag"].removeprefix("W/")):
+        response = client.get(path, headers={**headers, "If-None-Match": tag})
+        assert response.status_code == 304
+        assert response.headers["etag"] == full.headers["etag"]
+
+
+def test_small_bodies_get_the_weak_tag_too(client, member_headers, monkeypatch):
+    from app.compression.compression import compressor
+
+    monkeypatch.setattr(compressor, "min_size", 10 ** 6)
+    response = client.get("/books/5", headers={**member_headers, "Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"].startswith('W/"')
+
+
+def test_if_match_needs_the_strong_book_etag(client, admin_headers, compress_everything):
+    weak = client.get("/books/6", headers={**admin_headers, "Accept-Encoding": "gzip"}).headers["etag"]
+    response = client.patch("/books/6", json={"page_count": 320}, headers={**admin_headers, "If-Match": weak})
+    assert response.status_code == 412
+
+    strong = client.get("/books/6", headers={**admin_headers, "Accept-Encoding": "identity"}).headers["etag"]
+    assert not strong.startswith("W/")
+    response = client.patch("/books/6", json={"page_count": 321}, headers={**admin_headers, "If-Match": strong})
+    assert response.status_code == 200, response.text
+    stale = client.patch("/books/6", json={"page_count": 322}, headers={**admin_headers, "If-Match": strong})
+    assert stale.status_code == 412
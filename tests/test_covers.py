@@ -0,0 +1,67 @@
+import asyncio
+import json
+import os
+
+from conftest import DATA_DIR
+
+BOOK = {"title": "Cover Test", "genre": "Poetry", "page_count": 10, "publication_year": 2001,
+        "description": "d", "authors": [{"name": "Author 1"}]}
+
+
+def test_create_rejects_a_cover_path_in_the_json(client, member_headers):
+    victim = os.path.join(DATA_DIR, "victim.txt")
+    response = client.post("/books/", data={"book": json.dumps({**BOOK, "cover_image": victim})},
+                           headers=member_headers)
+    assert response.status_code == 400
+
+
+def test_update_rejects_a_cover_path(client, admin_headers):
+    response = client.patch("/books/5", json={"cover_image": "/etc/passwd"}, headers=admin_headers)
+    assert response.status_code == 422
+
+
+def test_legacy_cover_outside_cover_dir_is_kept(client):
+    from app.storage import covers
+
+    victim = os.path.join(DATA_DIR, "victim.txt")
+    open(victim, "w").close()
+    asyncio.run(covers.remove_cover_if_unused(None, victim, book_id=1))
+    asyncio.run(covers.remove_cover_if_unused(None, os.path.join(covers.settings.cover_dir, "..", "victim.txt"), 1))
+    assert os.path.exists(victim)
+
+
+def test_legacy_cover_inside_cover_dir_is_removed(client):
+    from app.storage import covers
+
+    os.makedirs(covers.settings.cover_dir, exist_ok=True)
+    legacy = covers.cover_path("legacy.jpg")
+    open(legacy, "w").close()
+    asyncio.run(covers.remove_cover_if_unused(None, legacy, book_id=1))
+    assert not os.path.exists(legacy)
+
+
+class NoOtherBooks:
+    # A session whose reference count finds no other book with the cover.
+    async def scalar(self, stmt):
+        return 0
+
+
+def test_a_reused_cover_is_kept_by_a_pending_cleanup(client):
+    from app.storage import covers
+
+    os.makedirs(covers.settings.cover_dir, exist_ok=True)
+    name = "a" * 64 + ".png"
+    path = covers.cover_path(name)
+    open(path, "w").close()
+    os.utime(path, (0, 0))  # stored long ago
+
+    upload = covers.cover_path("upload.tmp")
+    open(upload, "w").close()
+    assert covers._commit_temp(upload, path) is False  # same bytes uploaded again: touched
+
+    asyncio.run(covers.remove_cover_if_unused(NoOtherBooks(), "/covers/" + name, book_id=1))
+    assert os.path.exists(path)
+
+    os.utime(path, (0, 0))
+    asyncio.run(covers.remove_cover_if_unused(NoOtherBooks(), "/covers/" + name, book_id=1))
+    assert not os.path.exists(path)
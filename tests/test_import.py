@@ -0,0 +1,28 @@
+import json
+
+BOOK = {"title": "Imported", "genre": "Poetry", "page_count": 10, "publication_year": 2001,
+        "description": "d", "authors": [{"name": "Author 2"}]}
+
+
+def post_import(client, headers, name: str, content: bytes):
+    response = client.post("/books/import", files={"file": (name, content)}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_bad_utf8_costs_only_its_ndjson_row(client, admin_headers):
+    good = json.dumps(BOOK).encode()
+    report = post_import(client, admin_headers, "books.ndjson", b"\n".join([good, b'{"title": "\xff"}', good]))
+    assert (report["imported"], report["failed"]) == (2, 1)
+    assert report["errors"][0]["row"] == 2
+    assert report["errors"][0]["error"].startswith("Invalid UTF-8")
+
+
+def test_unreadable_csv_is_reported_after_the_rows_before_it(client, admin_headers):
+    # Enough rows that the bad bytes are past the first block the decoder reads.
+    rows = ["title,genre,page_count,publication_year,description,authors"]
+    rows += [f"CSV {i},Poetry,10,2001,d,Author 2" for i in range(500)]
+    content = "\n".join(rows).encode() + b"\nBroken \xff,Poetry,10,2001,d,Author 2\n"
+    report = post_import(client, admin_headers, "books.csv", content)
+    assert report["imported"] > 0 and report["failed"] == 1
+    assert report["errors"][0]["error"].startswith("Could not read the rest of the file")
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+from sqlalchemy import select
+
+
+@pytest.fixture
+def run_job(client):
+    # Jobs run on the app's event loop, where its engine's connections live.
+    from app.db.db import AsyncSessionLocal
+    from app.jobs.jobs import job_queue
+    from app.models.models import Job
+
+    async def add_and_run(name: str, **payload):
+        # The row is written directly, so a job with no handler can be stored.
+        async with AsyncSessionLocal() as db:
+            job = Job(name=name, payload=json.dumps(payload))
+            db.add(job)
+            await db.commit()
+        await job_queue.run(job.id)
+        return await read_job(job.id)
+
+    return lambda name, **payload: client.portal.call(lambda: add_and_run(name, **payload))
+
+
+async def read_job(job_id: int):
+    from app.db.db import AsyncSessionLocal
+    from app.models.models import Job
+
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(Job).where(Job.id == job_id))
+
+
+def test_bulk_reviews_commit_their_recompute_job(client, member_headers):
+    # JOB_WORKERS=0 in the tests, so the job row is left in the table.
+    from app.models.models import Job
+
+    response = client.post("/reviews/bulk", json=[{"book_id": 11, "rating": 4, "text": "ok"}], headers=member_headers)
+    assert response.status_code == 200, response.text
+
+    async def jobs_for_book():
+        from app.db.db import AsyncSessionLocal
+
+        async with AsyncSessionLocal() as db:
+            payloads = (await db.scalars(select(Job.payload).where(Job.name == "books.recompute_ratings"))).all()
+        return [json.loads(payload)["book_ids"] for payload in payloads]
+
+    assert [11] in client.portal.call(jobs_for_book)
+
+
+def test_lookup_errors_from_a_handler_are_retried(run_job, monkeypatch):
+    from app.jobs.jobs import job_queue
+
+    async def flaky(db, key: str) -> None:
+        raise KeyError(key)
+
+    monkeypatch.setitem(job_queue.handlers, "tests.flaky", flaky)
+    job = run_job("tests.flaky", key="missing")
+    assert (job.status, job.attempts) == ("pending", 1)
+
+
+def test_jobs_without_a_handler_fail_at_once(run_job):
+    job = run_job("tests.removed")
+    assert (job.status, job.attempts) == ("failed", 1)
+    assert job.last_error.startswith("UnknownJob")
+
+
+def test_add_rejects_unknown_jobs(client):
+    from app.db.db import AsyncSessionLocal
+    from app.jobs.jobs import UnknownJob, job_queue
+
+    with pytest.raises(UnknownJob):
+        job_queue.add(AsyncSessionLocal(), "tests.removed")
@@ -0,0 +1,20 @@
+import pytest
+
+from app.utils.logging_utils import should_log_request
+from app.utils.utils import log_fields
+
+
+@pytest.mark.parametrize("method", ["POST", "PATCH", "DELETE"])
+def test_writes_on_sampled_paths_are_always_logged(monkeypatch, method):
+    monkeypatch.setattr("app.utils.logging_utils.random.random", lambda: 0.99)
+    assert should_log_request(method, "/books/12", 200, 1.0)
+
+
+def test_reads_on_sampled_paths_are_sampled(monkeypatch):
+    monkeypatch.setattr("app.utils.logging_utils.random.random", lambda: 0.99)
+    assert not should_log_request("GET", "/books/12", 200, 1.0)
+    assert should_log_request("GET", "/books/12", 500, 1.0)
+
+
+def test_fields_that_clash_with_log_record_attributes_are_prefixed():
+    assert log_fields({"filename": "a.csv", "rows": 3}) == {"field_filename": "a.csv", "rows": 3}
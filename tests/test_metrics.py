@@ -0,0 +1,40 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.metrics.metrics import instrument_engine, metrics
+
+
+def test_failed_statements_leave_no_timing_behind():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM missing_table"))
+        before = metrics.db_queries
+        conn.execute(text("SELECT 1"))
+        assert metrics.db_queries == before + 1
+        assert "query_start" not in conn.info
+
+
+def test_pool_wait_stats_are_kept_per_engine():
+    from app.db.pool import TimedQueuePool, pool_status
+    from app.metrics.metrics import render_prometheus
+    from conftest import DATA_DIR
+
+    primary = create_engine(f"sqlite:///{DATA_DIR}/pool_primary.db", poolclass=TimedQueuePool)
+    replica = create_engine(f"sqlite:///{DATA_DIR}/pool_replica.db", poolclass=TimedQueuePool)
+    for _ in range(3):
+        with primary.connect():
+            pass
+    primary.dispose()  # a new pool instance, same counters
+    with primary.connect():
+        pass
+
+    assert pool_status(primary)["wait"]["checkouts"] == 4
+    assert pool_status(replica)["wait"]["checkouts"] == 0
+    body = render_prometheus({"primary": pool_status(primary), "replica-1": pool_status(replica)},
+                             {"hits": 0, "misses": 0})
+    assert 'db_pool_checkouts_total{engine="primary"} 4' in body
+    assert 'db_pool_checkouts_total{engine="replica-1"} 0' in body
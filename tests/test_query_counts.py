@@ -0,0 +1,46 @@
+import pytest
+
+# Statements per request, independent of the page size: one for the rows and
+# at most one more for their authors. A per-row load would grow with the page.
+LIST_ENDPOINTS = {
+    "offset page": ("/books/?limit={size}", 2),
+    "offset page, skip": ("/books/?skip=3&limit={size}", 2),
+    "cursor first page": ("/books/?cursor=&limit={size}", 2),
+    "cursor next page": ("/books/?cursor={cursor}&limit={size}", 2),
+    "search": ("/books/?search=shadow&limit={size}", 2),
+    "search, cursor": ("/books/?search=shadow&cursor=&limit={size}", 2),
+    "genre filter": ("/books/?genre=fantasy&limit={size}", 2),
+    "author filter": ("/books/?author=Author 3&limit={size}", 2),
+    "sorted by rating": ("/books/?sort=rating&limit={size}", 2),
+    "author's books": ("/authors/3/books?limit={size}", 2),
+    "authors": ("/authors/?limit={size}", 1),
+}
+
+
+def count_statements(client, statements, path: str, headers: dict) -> int:
+    statements.clear()
+    response = client.get(path, headers=headers)
+    assert response.status_code == 200, response.text
+    return len(statements)
+
+
+@pytest.mark.parametrize("name", LIST_ENDPOINTS)
+def test_list_statements_do_not_grow_with_page_size(client, member_headers, statements, no_response_cache, name):
+    path, expected = LIST_ENDPOINTS[name]
+    cursor = client.get("/books/?cursor=&limit=2", headers=member_headers).json()["next_cursor"]
+    counts = {
+        size: count_statements(client, statements, path.format(size=size, cursor=cursor), member_headers)
+        for size in (2, 10, 40)
+    }
+    assert counts == {2: expected, 10: expected, 40: expected}
+
+
+def test_book_detail(client, member_headers, statements, no_response_cache):
+    assert count_statements(client, statements, "/books/7", member_headers) == 2
+
+
+def test_pages_return_what_was_asked_for(client, member_headers, no_response_cache):
+    # Guards the counts above against passing on empty pages.
+    assert len(client.get("/books/?limit=40", headers=member_headers).json()) == 40
+    assert len(client.get("/books/?search=shadow&limit=40", headers=member_headers).json()) == 40
+    assert all(len(book["authors"]) == 2 for book in client.get("/books/?limit=40", headers=member_headers).json())
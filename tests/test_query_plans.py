@@ -0,0 +1,19 @@
+import os
+import sys
+
+from sqlalchemy import create_engine
+
+from conftest import DATA_DIR
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "benchmarks")))
+
+from check_query_plans import check_plans  # noqa: E402
+
+
+def test_hot_queries_use_their_indexes():
+    # A scratch file of its own: check_plans drops and recreates every table.
+    engine = create_engine(f"sqlite:///{DATA_DIR}/plans.db")
+    try:
+        assert check_plans(engine) == []
+    finally:
+        engine.dispose()
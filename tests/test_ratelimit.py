@@ -0,0 +1,39 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.ratelimit.ratelimit import MemoryBucketBackend, RateLimitMiddleware, RedisBucketBackend, parse_policies
+
+
+class FakeAsyncScriptClient:
+    # redis.asyncio's register_script returns a script whose call is awaited.
+    def __init__(self):
+        self.calls = []
+
+    def register_script(self, source):
+        async def script(keys, args):
+            self.calls.append(keys[0])
+            return [0, "2.5"]
+        return script
+
+
+def test_redis_buckets_are_awaited():
+    client = FakeAsyncScriptClient()
+    backend = RedisBucketBackend(client)
+    assert asyncio.run(backend.consume("login:ip:1", 10, 1.0)) == (False, 2.5)
+    assert client.calls == ["book_library:ratelimit:login:ip:1"]
+
+
+def test_middleware_limits_with_an_async_backend():
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, policies=parse_policies("GET /limited=2/60"),
+                       backend=MemoryBucketBackend())
+
+    @app.get("/limited")
+    def limited():
+        return {}
+
+    client = TestClient(app)
+    assert [client.get("/limited").status_code for _ in range(3)] == [200, 200, 429]
+    assert client.get("/limited").headers["Retry-After"] == "30"
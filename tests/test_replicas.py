@@ -0,0 +1,94 @@
+import asyncio
+import itertools
+import shutil
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from conftest import DATA_DIR
+
+
+@pytest.fixture
+def lagging_replica(client, monkeypatch):
+    # A copy of the primary file stands in for a replica that stops receiving
+    # writes from here on, i.e. one that lags indefinitely.
+    from app.cache.cache import response_cache
+    from app.db.db import engine, replica_router, to_async_url
+
+    path = f"{DATA_DIR}/replica.db"
+    engine.dispose()
+    shutil.copyfile(f"{DATA_DIR}/primary.db", path)
+    replica = create_async_engine(to_async_url(f"sqlite:///{path}"))
+
+    monkeypatch.setattr(replica_router, "replicas", [replica])
+    monkeypatch.setattr(replica_router, "healthy", {replica: True})
+    monkeypatch.setattr(replica_router, "_order", itertools.cycle([replica]))
+    monkeypatch.setattr(replica_router, "_writes", {})
+    monkeypatch.setattr(response_cache, "enabled", True)
+    response_cache.backend.clear()
+    yield replica
+    response_cache.backend.clear()
+    asyncio.run(replica.dispose())
+
+
+def test_reads_go_to_the_replica(client, member_headers, lagging_replica):
+    from app.db.db import replica_router
+
+    before = replica_router.reads["replica"]
+    assert client.get("/books/3", headers=member_headers).status_code == 200
+    assert replica_router.reads["replica"] == before + 1
+
+
+def test_writer_reads_its_write_after_another_reader_hits_the_replica(
+    client, admin_headers, member_headers, lagging_replica
+):
+    original = client.get("/books/2", headers=member_headers).json()["title"]
+    response = client.patch("/books/2", json={"title": "Renamed on the primary"}, headers=admin_headers)
+    assert response.status_code == 200, response.text
+
+    # Another reader is routed to the lagging replica and sees the old title...
+    assert client.get("/books/2", headers=member_headers).json()["title"] == original
+    assert client.get("/books/?limit=5", headers=member_headers).json()[1]["title"] == original
+
+    # ...but must not leave it in the shared cache for the writer's sticky read.
+    assert client.get("/books/2", headers=admin_headers).json()["title"] == "Renamed on the primary"
+    assert client.get("/books/?limit=5", headers=admin_headers).json()[1]["title"] == "Renamed on the primary"
+
+
+def test_replica_pages_are_not_cached(client, member_headers, lagging_replica):
+    from app.cache.cache import response_cache
+
+    client.get("/books/4", headers=member_headers)
+    client.get("/reviews/book/4")
+    assert len(response_cache.backend) == 0
+
+
+def test_a_write_on_one_worker_pins_reads_on_another():
+    # Two routers stand in for two workers sharing one store.
+    from app.cache.cache import RedisCacheBackend
+    from app.db.db import async_engine
+    from app.db.replicas import ReplicaRouter
+    from test_cache import FakeAsyncRedis
+
+    replica = create_async_engine("sqlite+aiosqlite://")
+    shared = RedisCacheBackend(FakeAsyncRedis())
+    worker_a = ReplicaRouter(async_engine, [replica], store=shared)
+    worker_b = ReplicaRouter(async_engine, [replica], store=shared)
+
+    async def reads_after_write():
+        before = await worker_b.engine_for_read("token")
+        await worker_a.note_write("token")
+        return before, await worker_b.engine_for_read("token"), await worker_b.engine_for_read("other")
+
+    assert asyncio.run(reads_after_write()) == (replica, async_engine, replica)
+
+
+def test_replicas_with_several_workers_need_a_shared_store(monkeypatch):
+    from app.db.replicas import check_worker_count, settings
+
+    monkeypatch.setattr(settings, "database_replica_urls", "postgresql://replica/db")
+    check_worker_count(1)
+    with pytest.raises(RuntimeError):
+        check_worker_count(4)
+    monkeypatch.setattr(settings, "cache_backend", "redis")
+    check_worker_count(4)
@@ -0,0 +1,32 @@
+def test_bulk_rejects_invalid_utf8(client, member_headers):
+    response = client.post("/reviews/bulk", content=b'[{"book_id": 1, "rating": 4, "text": "\xff"}]',
+                           headers={**member_headers, "Content-Type": "application/json"})
+    assert response.status_code == 400
+
+
+def test_bulk_ndjson_reports_invalid_utf8_for_its_row(client, member_headers):
+    body = b'{"book_id": 12, "rating": 5}\n{"book_id": 12, "rating": 4, "text": "\xff"}\n'
+    response = client.post("/reviews/bulk", content=body,
+                           headers={**member_headers, "Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200, response.text
+    assert [result["status"] for result in response.json()["results"]] == [201, 422]
+
+
+def test_bulk_refuses_a_body_over_the_byte_limit(client, member_headers, monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "review_bulk_max_bytes", 64)
+    body = b'[' + b','.join([b'{"book_id": 1, "rating": 4}'] * 10) + b']'
+    response = client.post("/reviews/bulk", content=body,
+                           headers={**member_headers, "Content-Type": "application/json"})
+    assert response.status_code == 413
+
+
+def test_bulk_stops_reading_a_chunked_body_over_the_limit(client, member_headers, monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "review_bulk_max_bytes", 64)
+    chunks = iter([b'[{"book_id": 1, "rating": 4}'] + [b',{"book_id": 1, "rating": 4}'] * 9 + [b']'])
+    response = client.post("/reviews/bulk", content=chunks,
+                           headers={**member_headers, "Content-Type": "application/json"})
+    assert response.status_code == 413
@@ -0,0 +1,45 @@
+import pytest
+
+from app.utils.jwt_utils import InvalidToken, TokenCache, create_access_token
+
+
+def test_logout_is_seen_by_other_workers(client):
+    # Two token caches and feeds stand in for two workers sharing the database.
+    from app.db.db import AsyncSessionLocal
+    from app.revocations.revocations import RevocationFeed
+
+    worker_a = RevocationFeed(AsyncSessionLocal, TokenCache(100))
+    worker_b = RevocationFeed(AsyncSessionLocal, TokenCache(100))
+    token = create_access_token({"sub": "a@tests.example", "role": "Member", "id": 1})
+    assert worker_b.tokens.decode(token)["id"] == 1  # now cached on worker b
+
+    client.portal.call(worker_a.revoke, token)
+    with pytest.raises(InvalidToken):
+        worker_a.tokens.decode(token)
+    assert worker_b.tokens.decode(token)["id"] == 1  # until its next poll
+
+    client.portal.call(worker_b.poll)
+    with pytest.raises(InvalidToken):
+        worker_b.tokens.decode(token)
+
+
+def test_a_restarted_worker_loads_earlier_logouts(client):
+    from app.db.db import AsyncSessionLocal
+    from app.revocations.revocations import RevocationFeed
+
+    token = create_access_token({"sub": "b@tests.example", "role": "Member", "id": 2})
+    client.portal.call(RevocationFeed(AsyncSessionLocal, TokenCache(100)).revoke, token)
+
+    restarted = RevocationFeed(AsyncSessionLocal, TokenCache(100))
+    client.portal.call(restarted.start)
+    client.portal.call(restarted.stop)
+    with pytest.raises(InvalidToken):
+        restarted.tokens.decode(token)
+
+
+def test_logout_endpoint_revokes_the_token(client):
+    from conftest import login
+
+    headers = login(client, "logout@tests.example")
+    assert client.post("/users/logout", headers=headers).status_code == 204
+    assert client.get("/books/1", headers=headers).status_code == 401